@@ -14,6 +14,7 @@ class UFAdmin(admin.ModelAdmin):
 @admin.register(City)
 class CityAdmin(admin.ModelAdmin):
     list_display = ('name', 'uf', 'idle')
+    list_select_related = ('uf',)
     search_fields = ('name',)
     list_filter = ('uf', 'idle')
     autocomplete_fields = ['uf']
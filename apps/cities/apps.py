@@ -5,3 +5,7 @@ from django.apps import AppConfig
 
 class CitiesConfig(AppConfig):
     name = 'cities'
+
+    def ready(self):
+        # Registra os signals de invalidação dos caches de cidades
+        from . import signals  # noqa: PLC0415 (apps carregados só no ready)
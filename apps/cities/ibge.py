@@ -0,0 +1,150 @@
+# apps/cities/ibge.py
+
+"""
+Carga dos estados e municípios do IBGE a partir de um snapshot local.
+
+O snapshot é um arquivo JSON Lines compactado (gzip) com uma linha por registro,
+estados primeiro:
+    {"type": "uf", "id": 31, "abbreviation": "MG", "name": "Minas Gerais"}
+    {"type": "city", "id": 3106200, "name": "Belo Horizonte", "uf_id": 31}
+
+A leitura é em streaming e a gravação é feita em lotes idempotentes: cada lote
+compara com o que já existe no banco e apenas insere os novos e atualiza os
+alterados. Rodar de novo sobre uma base atualizada não escreve nada.
+
+Funciona tanto com os models reais (comando load_ibge) quanto com os models
+históricos das migrações (apps.get_model).
+"""
+
+import gzip
+import io
+import json
+import os
+from collections import Counter
+from urllib.request import Request, urlopen
+
+from django.db import transaction
+from django.utils import timezone
+
+SNAPSHOT_PATH = os.path.join(os.path.dirname(__file__), 'data', 'ibge_localidades.jsonl.gz')
+
+IBGE_UFS_URL = "https://servicodados.ibge.gov.br/api/v1/localidades/estados"
+IBGE_CITIES_URL = "https://servicodados.ibge.gov.br/api/v1/localidades/municipios?view=nivelado"
+
+UF_FIELDS = ('abbreviation', 'name')
+CITY_FIELDS = ('name', 'uf_id')
+
+
+def iter_snapshot(path=SNAPSHOT_PATH):
+    """
+    Percorre o snapshot linha a linha, sem carregá-lo inteiro na memória.
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _upsert_batch(model, rows, fields, stats):
+    """
+    Insere os registros novos e atualiza os alterados de um lote.
+    """
+    existing = model.objects.in_bulk([row['id'] for row in rows])
+    # bulk_update não aciona o auto_now: a versão (updated_at) é atualizada à mão, se existir
+    tracked = any(f.name == 'updated_at' for f in model._meta.concrete_fields)
+    now = timezone.now()
+
+    new, changed = [], []
+    for row in rows:
+        obj = existing.get(row['id'])
+        if obj is None:
+            new.append(model(id=row['id'], idle=False, **{f: row[f] for f in fields}))
+        elif any(getattr(obj, f) != row[f] for f in fields):
+            for f in fields:
+                setattr(obj, f, row[f])
+            if tracked:
+                obj.updated_at = now
+            changed.append(obj)
+        else:
+            stats['unchanged'] += 1
+
+    if new:
+        model.objects.bulk_create(new)
+    if changed:
+        model.objects.bulk_update(changed, [*fields, 'updated_at'] if tracked else fields)
+    stats['created'] += len(new)
+    stats['updated'] += len(changed)
+
+
+def load_snapshot(uf_model, city_model, path=SNAPSHOT_PATH, batch_size=1000):
+    """
+    Carrega o snapshot no banco. Retorna as diferenças por tipo:
+    {'uf': Counter(created, updated, unchanged, extra), 'city': Counter(...)}
+    'extra' conta registros do banco que não estão no snapshot (não são apagados).
+    """
+    models = {'uf': (uf_model, UF_FIELDS), 'city': (city_model, CITY_FIELDS)}
+    stats = {kind: Counter(created=0, updated=0, unchanged=0) for kind in models}
+    batches = {kind: [] for kind in models}
+
+    def flush(kind):
+        if batches[kind]:
+            model, fields = models[kind]
+            _upsert_batch(model, batches[kind], fields, stats[kind])
+            batches[kind] = []
+
+    with transaction.atomic():
+        for row in iter_snapshot(path):
+            kind = row.get('type')
+            if kind not in models:
+                continue
+            if kind == 'city':
+                # Os estados precisam existir antes das cidades (FK)
+                flush('uf')
+            batches[kind].append(row)
+            if len(batches[kind]) >= batch_size:
+                flush(kind)
+        flush('uf')
+        flush('city')
+
+    for kind, (model, _) in models.items():
+        seen = stats[kind]['created'] + stats[kind]['updated'] + stats[kind]['unchanged']
+        stats[kind]['extra'] = max(model.objects.count() - seen, 0)
+    return stats
+
+
+def _get_json(url):
+    req = Request(url)  # noqa: S310 (URL fixa do IBGE)
+    req.add_header('User-Agent', 'Mozilla/5.0 (RN Pinturas - load_ibge)')
+    with urlopen(req, timeout=60) as response:  # noqa: S310 (URL fixa do IBGE)
+        content = response.read()
+    if content[:2] == b'\x1f\x8b':
+        content = gzip.decompress(content)
+    return json.loads(content.decode('utf-8'))
+
+
+def download_snapshot(path=SNAPSHOT_PATH):
+    """
+    Baixa estados e municípios da API do IBGE e grava um novo snapshot
+    (arquivo temporário + rename). Retorna (qtd_estados, qtd_cidades).
+    """
+    ufs = _get_json(IBGE_UFS_URL)
+    cities = _get_json(IBGE_CITIES_URL)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    # mtime fixo no cabeçalho do gzip: os mesmos dados geram os mesmos bytes (sem diff no git)
+    with open(tmp_path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as gz, \
+            io.TextIOWrapper(gz, encoding='utf-8') as f:
+        for item in sorted(ufs, key=lambda i: i['id']):
+            row = {'type': 'uf', 'id': item['id'], 'abbreviation': item['sigla'], 'name': item['nome']}
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+        for item in sorted(cities, key=lambda i: i['municipio-id']):
+            row = {
+                'type': 'city',
+                'id': item['municipio-id'],
+                'name': item['municipio-nome'],
+                'uf_id': item['UF-id'],
+            }
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, path)
+    return len(ufs), len(cities)
@@ -0,0 +1,72 @@
+# apps/cities/management/commands/load_ibge.py
+
+import os
+import time
+
+from cities.ibge import SNAPSHOT_PATH, download_snapshot, load_snapshot
+from cities.models import UF, City
+from cities.search import invalidate_city_index
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+LABELS = {'uf': 'Estados', 'city': 'Cidades'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Carrega (de forma idempotente) os estados e municípios do IBGE a partir "
+        "do snapshot local, sem acesso à rede, e informa as diferenças aplicadas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--snapshot', default=SNAPSHOT_PATH,
+            help="Arquivo .jsonl.gz do snapshot (padrão: o snapshot do app cities)",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help="Registros por lote")
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Apenas calcula as diferenças, sem gravar no banco",
+        )
+        parser.add_argument(
+            '--download', action='store_true',
+            help="Atualiza o snapshot pela API do IBGE antes de carregar (requer rede)",
+        )
+
+    def handle(self, *args, **options):
+        path = options['snapshot']
+
+        if options['download']:
+            self.stdout.write("Baixando estados e municípios do IBGE...")
+            try:
+                total_ufs, total_cities = download_snapshot(path)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Falha ao baixar os dados do IBGE: {e}") from e
+            self.stdout.write(f"Snapshot atualizado: {total_ufs} estados, {total_cities} cidades.")
+
+        if not os.path.exists(path):
+            raise CommandError(
+                f"Snapshot não encontrado: {path}. "
+                "Gere-o com 'python manage.py load_ibge --download'."
+            )
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            stats = load_snapshot(UF, City, path, batch_size=options['batch_size'])
+            if options['dry_run']:
+                transaction.set_rollback(True)
+        elapsed = time.perf_counter() - started
+
+        for kind, counter in stats.items():
+            self.stdout.write(
+                f"{LABELS[kind]}: {counter['created']} novos, {counter['updated']} atualizados, "
+                f"{counter['unchanged']} sem alteração, {counter['extra']} fora do snapshot"
+            )
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Simulação concluída em {elapsed:.2f}s (nada gravado)."))
+            return
+
+        # A carga em lote não dispara signals: invalida o índice do autocomplete manualmente
+        invalidate_city_index()
+        self.stdout.write(self.style.SUCCESS(f"✅ Carga do IBGE concluída em {elapsed:.2f}s."))
@@ -1,83 +1,74 @@
 # apps/cities/migrations/0002_populate_ibge_data.py
 
-from django.db import migrations
-import json
+"""
+Carga inicial dos estados e municípios do IBGE a partir do snapshot versionado
+no app (apps/cities/data/ibge_localidades.jsonl.gz), sem acesso à rede: a
+migração dá o mesmo resultado em qualquer máquina (deploys, CI e testes).
+
+Sem o snapshot a migração falha: uma tabela de cidades vazia quebraria os
+cadastros de endereço. O snapshot é gerado (e atualizado) com
+'python manage.py load_ibge --download', em uma máquina com rede, e versionado.
+Para migrar sem as cidades (ex: testes que não usam endereços), defina
+IBGE_SKIP_LOAD=1.
+
+O código de leitura é uma cópia congelada (cities.ibge pode mudar sem alterar
+o resultado desta migração).
+"""
+
 import gzip
-from urllib.request import urlopen, Request
-from urllib.error import HTTPError
+import json
+import os
+
+from django.db import migrations
+
+SNAPSHOT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'ibge_localidades.jsonl.gz'
+)
+BATCH_SIZE = 1000
+
+
+def iter_snapshot(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
 
 def load_ibge_data(apps, schema_editor):
     UF = apps.get_model('cities', 'UF')
     City = apps.get_model('cities', 'City')
 
-    print("\n--- Iniciando Importação do IBGE (Versão Blindada) ---")
-
-    # Função auxiliar para baixar e lidar com GZIP
-    def get_json_from_url(url):
-        req = Request(url)
-        req.add_header('User-Agent', 'Mozilla/5.0 (Django Migration)')
-        
-        try:
-            with urlopen(req) as response:
-                content = response.read()
-                if response.info().get('Content-Encoding') == 'gzip' or content[:2] == b'\x1f\x8b':
-                    content = gzip.decompress(content)
-                return json.loads(content.decode('utf-8'))
-        except HTTPError as e:
-            print(f"Erro ao baixar {url}: {e}")
-            return []
-
-    # 1. IMPORTAR ESTADOS (UFs)
-    url_ufs = "https://servicodados.ibge.gov.br/api/v1/localidades/estados"
-    print(f"Baixando UFs de: {url_ufs}")
-    
-    ufs_data = get_json_from_url(url_ufs)
-
-    if not ufs_data:
-        return
-
-    uf_objects = []
-    for item in ufs_data:
-        uf = UF(
-            id=item['id'],
-            abbreviation=item['sigla'],
-            name=item['nome'],
-            idle=False
-        )
-        uf_objects.append(uf)
-    
-    UF.objects.bulk_create(uf_objects, ignore_conflicts=True)
-    print("✅ Estados importados com sucesso!")
-
-    # 2. IMPORTAR CIDADES (Municípios)
-    # TRUQUE: ?view=nivelado evita o erro de hierarquia deep nesting
-    url_cities = "https://servicodados.ibge.gov.br/api/v1/localidades/municipios?view=nivelado"
-    print(f"Baixando Cidades de: {url_cities}")
-    
-    cities_data = get_json_from_url(url_cities)
-
-    if not cities_data:
+    if os.getenv('IBGE_SKIP_LOAD', '').lower() in ('1', 'true', 'yes'):
         return
-
-    print(f"Encontradas {len(cities_data)} cidades. Processando...")
-
-    city_objects = []
-    for item in cities_data:
-        # Com a view nivelada, as chaves mudam, mas são seguras
-        # item['municipio-id'] -> ID da Cidade
-        # item['UF-id'] -> ID do Estado
-        
-        city = City(
-            id=item['municipio-id'],
-            name=item['municipio-nome'],
-            uf_id=item['UF-id'],
-            idle=False
+    if not os.path.exists(SNAPSHOT_PATH):
+        raise RuntimeError(
+            f"Snapshot do IBGE não encontrado ({SNAPSHOT_PATH}). Gere-o com "
+            "'python manage.py load_ibge --download' em uma máquina com rede e versione-o, "
+            "ou defina IBGE_SKIP_LOAD=1 para migrar sem as cidades."
         )
-        city_objects.append(city)
+    # Os estados vêm antes das cidades (FK); registros já existentes são mantidos
+    batches = {'uf': [], 'city': []}
+
+    def flush(kind):
+        if batches[kind]:
+            model = UF if kind == 'uf' else City
+            model.objects.bulk_create(batches[kind], ignore_conflicts=True)
+            batches[kind] = []
+
+    for row in iter_snapshot(SNAPSHOT_PATH):
+        kind = row.get('type')
+        if kind == 'uf':
+            batches['uf'].append(UF(id=row['id'], abbreviation=row['abbreviation'], name=row['name'], idle=False))
+        elif kind == 'city':
+            flush('uf')
+            batches['city'].append(City(id=row['id'], name=row['name'], uf_id=row['uf_id'], idle=False))
+        else:
+            continue
+        if len(batches[kind]) >= BATCH_SIZE:
+            flush(kind)
+    flush('uf')
+    flush('city')
 
-    # Salvando em lotes
-    City.objects.bulk_create(city_objects, batch_size=2000, ignore_conflicts=True)
-    print(f"✅ {len(cities_data)} Cidades importadas com sucesso!")
 
 def reverse_func(apps, schema_editor):
     UF = apps.get_model('cities', 'UF')
@@ -85,6 +76,7 @@ def reverse_func(apps, schema_editor):
     City.objects.all().delete()
     UF.objects.all().delete()
 
+
 class Migration(migrations.Migration):
 
     dependencies = [
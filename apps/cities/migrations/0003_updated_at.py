@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cities', '0002_populate_ibge_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+        migrations.AddField(
+            model_name='uf',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+    ]
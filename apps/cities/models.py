@@ -3,6 +3,16 @@
 from common.models import IdleBase
 from django.db import models
 
+from .reference import get_reference_data
+
+
+class CityManager(models.Manager):
+    """
+    Cidades quase sempre são exibidas com a sigla da UF: já traz a UF no mesmo JOIN.
+    """
+    def get_queryset(self):
+        return super().get_queryset().select_related('uf')
+
 
 class UF(IdleBase):
     """
@@ -33,6 +43,8 @@ class City(IdleBase):
     )
     name = models.CharField(max_length=255, verbose_name="Nome")
 
+    objects = CityManager()
+
     class Meta:
         verbose_name = "Cidade"
         verbose_name_plural = "Cidades"
@@ -40,4 +52,15 @@ class City(IdleBase):
         ordering = ['name']
 
     def __str__(self):
-        return f"{self.name} - {self.uf.abbreviation}"
+        # Sigla da UF vem dos dados de referência em memória (sem consulta por cidade)
+        uf = get_reference_data().uf(self.uf_id)
+        abbreviation = uf.abbreviation if uf else self.uf.abbreviation
+        return f"{self.name} - {abbreviation}"
+
+    @staticmethod
+    def reference(city_id):
+        """
+        Dados da cidade em memória (CityRef: name, label...) sem consultar o banco, ou None.
+        Usado pelos models que apontam para City (ex: AddressBase) sem importar o app cities.
+        """
+        return get_reference_data().city(city_id)
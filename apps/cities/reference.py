@@ -0,0 +1,148 @@
+# apps/cities/reference.py
+
+"""
+Cache de dados de referência (estados e cidades) em memória do processo.
+
+UFs e cidades praticamente não mudam, mas são exibidas o tempo todo
+("Belo Horizonte - MG", endereços dos clientes, admin, autocomplete). Em vez de
+buscar a UF/cidade de cada registro renderizado, o processo mantém um retrato
+imutável das duas tabelas, montado com duas consultas:
+    ReferenceData.ufs:    {id: UFRef(id, name, abbreviation)}
+    ReferenceData.cities: {id: CityRef(id, name, uf_id, uf_abbreviation)}
+
+Ciclo de vida:
+- Pré-carregado na subida do servidor (wsgi/asgi) via warm_reference_data().
+- Invalidado pelos signals de City/UF (signals.py): o retrato local é descartado
+  na hora e uma versão no cache do Django é incrementada para os demais processos.
+- Os demais processos conferem essa versão no máximo a cada
+  VERSION_CHECK_INTERVAL segundos, para não consultar o cache a cada __str__.
+"""
+
+import logging
+import threading
+import time
+from types import MappingProxyType
+from typing import NamedTuple
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = "cities:reference:version"
+VERSION_CHECK_INTERVAL = 5
+
+_lock = threading.Lock()
+_data = None
+_data_version = None
+_checked_at = 0.0
+
+
+class UFRef(NamedTuple):
+    id: int
+    name: str
+    abbreviation: str
+
+
+class CityRef(NamedTuple):
+    id: int
+    name: str
+    uf_id: int
+    uf_abbreviation: str
+
+    @property
+    def label(self):
+        return f"{self.name} - {self.uf_abbreviation}"
+
+
+class ReferenceData:
+    """
+    Retrato imutável (somente leitura) das tabelas de UF e cidades.
+    """
+
+    def __init__(self, ufs, cities):
+        self.ufs = MappingProxyType({uf.id: uf for uf in ufs})
+        self.cities = MappingProxyType({city.id: city for city in cities})
+
+    def __repr__(self):
+        return f"<ReferenceData ({len(self.ufs)} UFs, {len(self.cities)} cidades)>"
+
+    @classmethod
+    def build(cls):
+        UF = apps.get_model('cities', 'UF')
+        City = apps.get_model('cities', 'City')
+
+        ufs = [UFRef(*row) for row in UF.objects.values_list('id', 'name', 'abbreviation').order_by()]
+        abbreviations = {uf.id: uf.abbreviation for uf in ufs}
+        cities = [
+            CityRef(pk, name, uf_id, abbreviations.get(uf_id, ''))
+            for pk, name, uf_id in City.objects.values_list('id', 'name', 'uf_id').order_by()
+        ]
+        return cls(ufs, cities)
+
+    def uf(self, uf_id):
+        return self.ufs.get(uf_id)
+
+    def city(self, city_id):
+        return self.cities.get(city_id)
+
+
+def get_reference_data():
+    """
+    Retorna o retrato do processo, remontando-o se estiver ausente ou
+    se outro processo tiver sinalizado alteração em cidades/UFs.
+    """
+    global _data, _data_version, _checked_at  # noqa: PLW0603
+
+    now = time.monotonic()
+    if _data is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+        return _data
+
+    version = cache.get(VERSION_CACHE_KEY, 0)
+    if _data is None or version != _data_version:
+        with _lock:
+            if _data is None or version != _data_version:
+                _data = ReferenceData.build()
+                _data_version = version
+    _checked_at = now
+    return _data
+
+
+def warm_reference_data():
+    """
+    Monta o retrato na subida do servidor (wsgi/asgi). Falhas de banco
+    (ex: migrações pendentes) não impedem a subida: ele será montado sob demanda.
+    """
+    try:
+        get_reference_data()
+    except DatabaseError as e:
+        logger.warning(f"Dados de referência (UF/cidades) não pré-carregados: {e}")
+
+
+def reference_version():
+    """
+    Versão atual dos dados de referência (compõe o ETag das páginas que os exibem).
+    """
+    return cache.get(VERSION_CACHE_KEY, 0)
+
+
+def invalidate_reference_data():
+    """
+    Descarta o retrato local e avisa os demais processos via cache.
+    """
+    global _data  # noqa: PLW0603
+
+    _data = None
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
+
+
+def city_label(city_id):
+    """
+    Rótulo da cidade ("Nome - UF") sem consultar o banco, ou None se não existir.
+    """
+    city = get_reference_data().city(city_id)
+    return city.label if city else None
@@ -0,0 +1,143 @@
+# apps/cities/search.py
+
+"""
+Índice em memória das cidades para o autocomplete.
+
+Os ~5.570 municípios do IBGE cabem com folga na memória do processo. O índice
+é montado a partir dos dados de referência já carregados (sem consulta extra)
+e responde às buscas sem tocar o banco:
+1. Prefixo: busca binária na lista de nomes normalizados (ordem alfabética).
+2. Trechos do meio do nome: interseção das listas de trigramas do termo.
+
+O resultado vem ordenado: primeiro quem começa com o termo, depois quem apenas
+contém o termo, ambos em ordem alfabética.
+
+O índice é derivado do retrato de UFs/cidades em memória (reference.py) e é
+remontado sempre que esse retrato muda (signals de City/UF ou versão no cache).
+"""
+
+import logging
+import threading
+from bisect import bisect_left
+from typing import NamedTuple
+
+from common.normalization import normalize_search_text
+from django.db import DatabaseError
+
+from .reference import get_reference_data, invalidate_reference_data, warm_reference_data
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_index = None
+_index_source = None
+
+
+class CityEntry(NamedTuple):
+    id: int
+    label: str
+    key: str
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class CityIndex:
+    """
+    Índice imutável de cidades (prefixo + trigramas) sobre nomes sem acento.
+    """
+
+    def __init__(self, entries):
+        self.entries = sorted(entries, key=lambda e: (e.key, e.label))
+        self.keys = [e.key for e in self.entries]
+
+        postings = {}
+        for position, entry in enumerate(self.entries):
+            for trigram in _trigrams(entry.key):
+                postings.setdefault(trigram, []).append(position)
+        self.postings = {trigram: frozenset(p) for trigram, p in postings.items()}
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def build(cls, reference):
+        return cls(
+            CityEntry(city.id, city.label, normalize_search_text(city.name))
+            for city in reference.cities.values()
+        )
+
+    def _prefix_positions(self, term):
+        start = bisect_left(self.keys, term)
+        end = start
+        while end < len(self.keys) and self.keys[end].startswith(term):
+            end += 1
+        return range(start, end)
+
+    def _contains_positions(self, term):
+        trigrams = _trigrams(term)
+        if not trigrams:
+            # Termo curto demais para trigramas: varredura simples
+            return [i for i, key in enumerate(self.keys) if term in key]
+
+        postings = sorted((self.postings.get(t, frozenset()) for t in trigrams), key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        # Os trigramas só garantem candidatos: confirma o trecho completo
+        return sorted(i for i in candidates if term in self.keys[i])
+
+    def search(self, term, limit=20):
+        """
+        Retorna até 'limit' CityEntry que casam com o termo (sem acento, sem caixa).
+        """
+        term = normalize_search_text(term)
+        if not term:
+            return []
+
+        results = [self.entries[i] for i in self._prefix_positions(term)[:limit]]
+        if len(results) < limit:
+            for i in self._contains_positions(term):
+                if not self.keys[i].startswith(term):
+                    results.append(self.entries[i])
+                    if len(results) >= limit:
+                        break
+        return results
+
+
+def get_city_index():
+    """
+    Retorna o índice do processo, reconstruindo-o se o retrato de
+    UFs/cidades do qual ele deriva tiver sido remontado.
+    """
+    global _index, _index_source  # noqa: PLW0603
+
+    reference = get_reference_data()
+    if _index is None or reference is not _index_source:
+        with _lock:
+            if _index is None or reference is not _index_source:
+                _index = CityIndex.build(reference)
+                _index_source = reference
+    return _index
+
+
+def warm_city_index():
+    """
+    Monta os dados de referência e o índice na subida do servidor (wsgi/asgi),
+    evitando que o primeiro usuário do autocomplete pague o custo. Falhas de
+    banco (ex: migrações pendentes) não impedem a subida.
+    """
+    warm_reference_data()
+    try:
+        get_city_index()
+    except DatabaseError as e:
+        logger.warning(f"Índice de cidades não pré-carregado: {e}")
+
+
+def invalidate_city_index():
+    """
+    Descarta o índice local junto com os dados de referência dos quais ele deriva.
+    """
+    global _index  # noqa: PLW0603
+
+    _index = None
+    invalidate_reference_data()
@@ -0,0 +1,20 @@
+# apps/cities/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import UF, City
+from .search import invalidate_city_index
+
+
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=UF)
+def invalidate_city_caches(sender, **kwargs):
+    """
+    Qualquer alteração em cidades ou estados invalida os dados de referência
+    em memória e o índice do autocomplete derivado deles.
+    Só depois do commit: antes disso, outra requisição poderia remontar o
+    retrato com as linhas antigas e guardá-lo sob a versão nova.
+    """
+    transaction.on_commit(invalidate_city_index, using=kwargs.get('using'))
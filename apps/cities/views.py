@@ -2,28 +2,23 @@
 
 from django.http import JsonResponse
 
-from .models import City
+from .search import get_city_index
 
 MIN_QUERY_LENGTH = 2
+MAX_RESULTS = 20
 
 
 def city_autocomplete_view(request):
     query = request.GET.get('term', '')
-    cities = City.objects.none()
-
-    if len(query) > MIN_QUERY_LENGTH:
-        # Busca por nome que contenha o texto (case insensitive)
-        cities = City.objects.filter(name__icontains=query)[:20]
-
     results = []
-    for city in cities:
-        # Tenta pegar a representação padrão (ex: "Belo Horizonte - MG")
-        # Se não tiver __str__ configurado, usa só o nome para garantir que não quebre
-        text_label = str(city)
 
-        results.append({
-            'id': city.id,
-            'text': text_label
-        })
+    if len(query) > MIN_QUERY_LENGTH:
+        # Busca no índice em memória (sem acentos, prefixo primeiro, depois trechos do nome).
+        # O rótulo (ex: "Belo Horizonte - MG") já vem pronto, sem consultar a UF de cada cidade.
+        for city in get_city_index().search(query, limit=MAX_RESULTS):
+            results.append({
+                'id': city.id,
+                'text': city.label
+            })
 
     return JsonResponse({'results': results})
@@ -1,15 +1,24 @@
 # apps/clients/forms.py
 
-import logging
-
 from cities.models import City
+from common.contact_types import get_contact_types
+from common.formsets import BatchInlineFormSet, MappedModelChoiceField
 from common.models import AuxContactType
 from django import forms
 from django.forms import inlineformset_factory
 
 from .models import Client, ClientAddress, ClientContact
 
-logger = logging.getLogger(__name__)
+
+def parse_city_id(value):
+    """
+    Id da cidade enviado no formulário, ou None se ausente/inválido.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
 
 class ClientForm(forms.ModelForm):
     name = forms.CharField(
@@ -180,36 +189,47 @@ class ClientAddressForm(forms.ModelForm):
             'district',
         ]
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, cities=None, **kwargs):
         super().__init__(*args, **kwargs)
 
         # LÓGICA DE PERFORMANCE (O Pulo do Gato)
-        # Por padrão, queryset vazio para não renderizar 5000 options no HTML
-        self.fields['city'].queryset = City.objects.none()
+        # O select de cidade usa autocomplete (AJAX): em vez de 5000 options, só a cidade
+        # enviada/atual é renderizada e validada, a partir do mapa {id: City} resolvido
+        # em uma consulta para o formset inteiro (ClientAddressBaseFormSet).
+        # Fora de um formset, o próprio formulário resolve a sua cidade.
+        if cities is None:
+            cities = City.objects.in_bulk(filter(None, [self.submitted_city_id()]))
+        self.cities = cities
 
-        # 1. Se tiver dados no POST (tentando salvar), carrega a cidade enviada para validar
-        if 'city' in self.data:
-            try:
-                city_id = int(self.data.get('city'))
-                self.fields['city'].queryset = City.objects.filter(pk=city_id)
-            except (ValueError, TypeError):
-                pass  # Input inválido, deixa vazio e o Django gerencia o erro field required
+        selected = self.cities.get(self.submitted_city_id())
+        field = self.fields['city']
+        self.fields['city'] = MappedModelChoiceField(
+            City.objects.none(),
+            objects=self.cities,
+            label=field.label,
+            required=field.required,
+            help_text=field.help_text,
+            error_messages=field.error_messages,
+            initial=field.initial,
+            widget=field.widget,
+        )
+        self.fields['city'].choices = [('', self.fields['city'].empty_label)] + (
+            [(selected.pk, str(selected))] if selected else []
+        )
 
-        # 2. Se for edição (instance já existe), carrega a cidade atual
-        elif self.instance.pk and self.instance.city:
-            self.fields['city'].queryset = City.objects.filter(pk=self.instance.city.pk)
-
-        # 3. Formset Management (O prefixo muda em formsets: 'address_set-0-city')
-        elif self.prefix:
-            # Tenta achar o campo no POST usando o prefixo (ex: clients-address-0-city)
-            field_name = f"{self.prefix}-city"
-            if self.data and field_name in self.data:
-                try:
-                    city_id = int(self.data.get(field_name))
-                    self.fields['city'].queryset = City.objects.filter(pk=city_id)
-                except Exception as e:
-                    logger.debug(f"Input inválido no campo city do formset: {e}")
+    def submitted_city_id(self):
+        """
+        Cidade do formulário: a enviada no POST ou, sem POST, a do endereço existente.
+        """
+        if self.is_bound:
+            return parse_city_id(self.data.get(self.add_prefix('city')))
+        return self.instance.city_id
 
+    def _get_validation_exclusions(self):
+        # A existência da cidade já foi conferida pelo mapa: evita o SELECT do ForeignKey.validate
+        exclude = super()._get_validation_exclusions()
+        exclude.add('city')
+        return exclude
 
 
 class ClientContactForm(forms.ModelForm):
@@ -255,12 +275,62 @@ class ClientContactForm(forms.ModelForm):
             'notes',
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Opções e validação pelo registro de tipos de contato em memória:
+        # nenhum formulário de contato consulta a tabela aux_contact_type
+        registry = get_contact_types()
+        field = self.fields['contact_type']
+        self.fields['contact_type'] = MappedModelChoiceField(
+            AuxContactType.objects.none(),
+            objects=registry.active,
+            label=field.label,
+            required=field.required,
+            help_text=field.help_text,
+            error_messages=field.error_messages,
+            initial=field.initial,
+            widget=field.widget,
+        )
+        self.fields['contact_type'].choices = [('', self.fields['contact_type'].empty_label), *registry.choices]
+
+    def _get_validation_exclusions(self):
+        # A existência do tipo já foi conferida pelo registro: evita o SELECT do ForeignKey.validate
+        exclude = super()._get_validation_exclusions()
+        exclude.add('contact_type')
+        return exclude
+
 
 # --- Definição dos FormSets ---
+class ClientAddressBaseFormSet(BatchInlineFormSet):
+    """
+    Resolve as cidades de todos os endereços (enviados e existentes) em uma
+    única consulta e entrega o mapa a cada formulário.
+    """
+
+    def get_cities(self):
+        if not hasattr(self, '_cities'):
+            if self.is_bound:
+                ids = {
+                    parse_city_id(self.data.get(f"{self.add_prefix(i)}-city"))
+                    for i in range(self.total_form_count())
+                }
+            else:
+                ids = {obj.city_id for obj in self.get_queryset()}
+            self._cities = City.objects.in_bulk(ids - {None})
+        return self._cities
+
+    def get_form_kwargs(self, index):
+        kwargs = super().get_form_kwargs(index)
+        kwargs['cities'] = self.get_cities()
+        return kwargs
+
+
 ClientAddressFormSet = inlineformset_factory(
     Client,
     ClientAddress,
     form=ClientAddressForm,
+    formset=ClientAddressBaseFormSet,
     extra=1,
     can_delete=True,
 )
@@ -269,6 +339,7 @@ ClientContactFormSet = inlineformset_factory(
     Client,
     ClientContact,
     form=ClientContactForm,
+    formset=BatchInlineFormSet,
     extra=1,
     can_delete=True,
 )
@@ -0,0 +1,423 @@
+# apps/clients/importer.py
+
+"""
+Importação em lote de clientes (CSV, XLSX ou JSON Lines).
+
+Cada linha do arquivo é um cliente, opcionalmente com um endereço e contatos:
+- Cliente: name (obrigatório), fantasy_name, person_type (F/J), cpf_cnpj,
+  rg_ie, idle, notes.
+- Endereço: zip_code, street, number, complement, district e a cidade em
+  'city' (código IBGE, "Nome - UF" ou só o nome com a sigla em 'uf'). Sem
+  cidade, ela é deduzida do CEP pelo índice offline de faixas, se houver.
+- Contatos: colunas indicadas pelo chamador -> tipo de contato
+  (ex: {'email': 5, 'celular': 3}).
+
+O arquivo é lido em streaming e processado em lotes, cada um em uma transação:
+1. Normalização por coluna, com as mesmas regras do save() dos models
+   (common.normalization); valores repetidos são calculados uma vez por lote.
+   Os valores normalizados são conferidos com as restrições dos campos
+   (max_length e choices): um valor inválido rejeita a linha, não o lote.
+2. Cidades resolvidas pelos dados de referência em memória (sem consulta por linha).
+3. Clientes: uma consulta busca os já existentes pelo CPF/CNPJ do lote e um
+   único bulk_create(update_conflicts=True) insere os novos e atualiza os
+   existentes. O CPF/CNPJ identifica o cliente: repetições no arquivo
+   atualizam o mesmo registro. Sem ele não há como reconhecer o cliente numa
+   nova importação: essas linhas são rejeitadas, a menos que o chamador aceite
+   inseri-las (require_document=False), e então são contadas à parte.
+4. Endereços e contatos: bulk_create, ignorando os que o cliente já possui
+   (importar o mesmo arquivo de novo não duplica nada).
+
+Linhas com erro não interrompem a carga: são entregues ao callback on_error
+com o motivo (o comando import_clients as grava em um CSV de erros).
+"""
+
+import csv
+import json
+import os
+from collections import Counter
+from itertools import islice
+
+from cities.reference import get_reference_data
+from common.cep_index import CEP_LENGTH, cidade_id_por_cep
+from common.normalization import (
+    clean_rg_ie,
+    clean_upper_text,
+    normalize_column,
+    normalize_search_text,
+    only_digits,
+)
+from common.xlsx import iter_xlsx_rows
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .models import Client, ClientAddress, ClientContact
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_FORMATS = ('csv', 'xlsx', 'jsonl')
+
+ADDRESS_FIELDS = ('zip_code', 'street', 'number', 'complement', 'district')
+ADDRESS_COLUMNS = (*ADDRESS_FIELDS, 'city', 'uf')
+
+# Comprimento do CNPJ (somente dígitos); abaixo disso é CPF
+CNPJ_LENGTH = 14
+# Sigla da UF em "Nome - UF" / "Nome/UF"
+UF_LENGTH = 2
+
+_TRUE_VALUES = {'1', 'true', 's', 'sim', 'y', 'yes', 'x'}
+
+
+class ImportRowError(ValueError):
+    """
+    Linha inválida: o motivo vai para o relatório de erros e a carga continua.
+    """
+
+
+# --- Leitura dos arquivos ---
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension in ('json', 'ndjson'):
+        return 'jsonl'
+    if extension not in IMPORT_FORMATS:
+        raise ValueError(f"Formato não suportado: '{extension}'. Use um de: {', '.join(IMPORT_FORMATS)}.")
+    return extension
+
+
+def _iter_csv(path):
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        # Aceita ';' (padrão do Excel em português e da exportação das listagens) ou ','
+        delimiter = ';' if sample.count(';') >= sample.count(',') else ','
+        yield from enumerate(csv.DictReader(f, delimiter=delimiter), start=2)
+
+
+def _iter_xlsx(path):
+    rows = iter_xlsx_rows(path)
+    header = next(rows, None)
+    if not header:
+        return
+    header = [str(h).strip() if h is not None else '' for h in header]
+    for line, values in enumerate(rows, start=2):
+        if any(v not in (None, '') for v in values):
+            yield line, dict(zip(header, values, strict=False))
+
+
+def _iter_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        for line, text in enumerate(f, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except json.JSONDecodeError as e:
+                row = {'__error__': f"JSON inválido: {e.msg}", '__raw__': text.rstrip('\r\n')}
+            if not isinstance(row, dict):
+                row = {'__error__': "A linha não é um objeto JSON.", '__raw__': text.rstrip('\r\n')}
+            yield line, row
+
+
+def iter_import_rows(path, file_format=None):
+    """
+    Percorre o arquivo devolvendo (número da linha, dicionário coluna -> valor).
+    """
+    readers = {'csv': _iter_csv, 'xlsx': _iter_xlsx, 'jsonl': _iter_jsonl}
+    return readers[file_format or detect_format(path)](path)
+
+
+# --- Normalização em lote ---
+
+def _text(value):
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    return _text(value).lower() in _TRUE_VALUES
+
+
+def _person_type(value, document):
+    value = _text(value).upper()[:1]
+    if value in ('F', 'J'):
+        return value
+    return 'J' if len(document or '') == CNPJ_LENGTH else 'F'
+
+
+class _CityResolver:
+    """
+    Resolve a cidade de um endereço pelos dados de referência em memória.
+    """
+
+    def __init__(self):
+        self.reference = get_reference_data()
+        self.by_name = {}
+        for city in self.reference.cities.values():
+            key = normalize_search_text(city.name)
+            self.by_name.setdefault((key, city.uf_abbreviation), city.id)
+            # Sem UF só resolve se o nome for único no país
+            self.by_name[(key, None)] = None if (key, None) in self.by_name else city.id
+
+    def resolve(self, city, uf, zip_code):
+        city = _text(city)
+        uf = _text(uf).upper() or None
+
+        if not city:
+            city_id = cidade_id_por_cep(zip_code) if len(zip_code or '') == CEP_LENGTH else None
+            if city_id is None or self.reference.city(city_id) is None:
+                raise ImportRowError("Cidade não informada e não encontrada pelo CEP.")
+            return city_id
+
+        if city.isdigit():
+            if self.reference.city(int(city)) is None:
+                raise ImportRowError(f"Código IBGE de cidade inexistente: {city}.")
+            return int(city)
+
+        # "Nome - UF" / "Nome/UF"
+        for separator in (' - ', '/'):
+            name, found, suffix = city.rpartition(separator)
+            if found and len(suffix.strip()) == UF_LENGTH:
+                city, uf = name, suffix.strip().upper()
+                break
+
+        city_id = self.by_name.get((normalize_search_text(city), uf))
+        if city_id is None:
+            if uf is None and (normalize_search_text(city), None) in self.by_name:
+                raise ImportRowError(f"Cidade '{city}' existe em mais de uma UF: informe a UF.")
+            raise ImportRowError(f"Cidade não encontrada: {city}{f' - {uf}' if uf else ''}.")
+        return city_id
+
+
+def _check_constraints(model, values):
+    """
+    Confere os valores de texto com max_length e choices do campo. No banco, um valor
+    longo demais derrubaria o lote inteiro (DataError no MySQL em modo estrito).
+    """
+    for name, value in values.items():
+        field = model._meta.get_field(name)
+        if value in (None, '') or not isinstance(field, models.CharField):
+            continue
+        if field.max_length and len(value) > field.max_length:
+            raise ImportRowError(
+                f"{field.verbose_name}: máximo de {field.max_length} caracteres ({len(value)} informados)."
+            )
+        if field.choices and value not in dict(field.flatchoices):
+            raise ImportRowError(f"{field.verbose_name}: valor inválido '{value}'.")
+
+
+def normalize_batch(rows, contact_columns, cities, require_document=True):
+    """
+    Normaliza um lote coluna a coluna. Retorna (registros válidos, erros), onde
+    cada registro é (linha, campos do cliente, campos do endereço ou None, contatos)
+    e cada erro é (linha, dados originais, motivo).
+    """
+    def column(name, normalizer):
+        return normalize_column([row.get(name) for _line, row in rows], normalizer)
+
+    names = column('name', clean_upper_text)
+    search_names = normalize_column(names, normalize_search_text)
+    fantasy_names = column('fantasy_name', clean_upper_text)
+    documents = column('cpf_cnpj', lambda v: only_digits(v) or None)
+    rgs = column('rg_ie', clean_rg_ie)
+    zip_codes = column('zip_code', lambda v: only_digits(v) or None)
+    address_text = {f: column(f, clean_upper_text) for f in ADDRESS_FIELDS if f != 'zip_code'}
+
+    records, errors = [], []
+    for i, (line, row) in enumerate(rows):
+        try:
+            if '__error__' in row:
+                raise ImportRowError(row['__error__'])
+            if not names[i]:
+                raise ImportRowError("Nome / Razão Social não informado.")
+            if require_document and not documents[i]:
+                raise ImportRowError(
+                    "CPF/CNPJ não informado: sem ele o cliente seria inserido de novo a cada importação."
+                )
+
+            client = {
+                'name': names[i],
+                'search_name': search_names[i],
+                'fantasy_name': fantasy_names[i],
+                'person_type': _person_type(row.get('person_type'), documents[i]),
+                'cpf_cnpj': documents[i],
+                'rg_ie': rgs[i],
+                'idle': _bool(row.get('idle')),
+                'notes': _text(row.get('notes')) or None,
+            }
+            # Colunas ausentes no arquivo não sobrescrevem o cadastro existente
+            # (o tipo de pessoa é deduzido do documento quando não informado)
+            client = {f: v for f, v in client.items() if f in row or f in ('name', 'search_name', 'person_type')}
+            _check_constraints(Client, client)
+
+            address = None
+            if any(_text(row.get(c)) for c in ADDRESS_COLUMNS):
+                address = {
+                    'zip_code': zip_codes[i],
+                    **{f: values[i] for f, values in address_text.items()},
+                    'city_id': cities.resolve(row.get('city'), row.get('uf'), zip_codes[i]),
+                }
+                _check_constraints(ClientAddress, address)
+
+            contacts = []
+            for column_name, type_id in contact_columns.items():
+                value = _text(row.get(column_name))
+                if value:
+                    value = ClientContact.normalize_value(type_id, value)
+                    _check_constraints(ClientContact, {'value': value})
+                    contacts.append((type_id, value))
+
+            records.append((line, client, address, contacts))
+        except ImportRowError as e:
+            errors.append((line, row, str(e)))
+
+    return records, errors
+
+
+# --- Gravação ---
+
+def _upsert_clients(records, stats):
+    """
+    Grava os clientes do lote com um único bulk_create(update_conflicts=True). Os valores
+    já vêm normalizados por normalize_batch (inclusive search_name): não passam de novo
+    por Client.normalize_fields().
+    Retorna, na ordem dos registros, a instância de cada um.
+    """
+    documents = {client['cpf_cnpj'] for _line, client, _a, _c in records if client.get('cpf_cnpj')}
+    existing = {c.cpf_cnpj: c for c in Client.objects.filter(cpf_cnpj__in=documents)} if documents else {}
+
+    now = timezone.now()
+    by_document = {}
+    instances, update_fields = [], {'updated_at'}
+    for _line, values, _address, _contacts in records:
+        document = values.get('cpf_cnpj')
+        instance = by_document.get(document) or existing.get(document)
+        if instance is None:
+            instance = Client(**values)
+        else:
+            if document in by_document:
+                stats['duplicates'] += 1
+            for field, value in values.items():
+                setattr(instance, field, value)
+        update_fields.update(values)
+        instance.updated_at = now
+        if document:
+            by_document[document] = instance
+        else:
+            stats['without_document'] += 1
+        instances.append(instance)
+
+    unique = list({id(i): i for i in instances}.values())
+    new = [i for i in unique if i.pk is None]
+    update_fields.discard('cpf_cnpj')
+
+    # Bancos que não devolvem as pks de um INSERT em lote (MySQL): os novos com CPF/CNPJ
+    # são localizados depois pelo documento; os sem documento são gravados um a um
+    returns_pks = connection.features.can_return_rows_from_bulk_insert
+    one_by_one = [] if returns_pks else [i for i in new if not i.cpf_cnpj]
+    batched = [i for i in unique if not any(i is o for o in one_by_one)]
+
+    # A pk identifica o conflito: os existentes já vêm com ela (consultados pelo CPF/CNPJ).
+    # No MySQL o ON DUPLICATE KEY UPDATE não aceita alvo: unique_fields fica de fora.
+    target = ['pk'] if connection.features.supports_update_conflicts_with_target else None
+    Client.objects.bulk_create(
+        batched,
+        update_conflicts=True,
+        unique_fields=target,
+        update_fields=sorted(update_fields),
+    )
+    for instance in one_by_one:
+        instance.save(force_insert=True)
+
+    if not returns_pks:
+        pks = dict(
+            Client.objects.filter(cpf_cnpj__in=[i.cpf_cnpj for i in new if i.cpf_cnpj])
+            .values_list('cpf_cnpj', 'pk')
+        )
+        for instance in new:
+            if instance.pk is None:
+                instance.pk = pks[instance.cpf_cnpj]
+
+    stats['created'] += len(new)
+    stats['updated'] += len(unique) - len(new)
+    return instances
+
+
+def _address_key(values):
+    return tuple(values.get(f) for f in (*ADDRESS_FIELDS, 'city_id'))
+
+
+def _insert_children(records, clients, stats):
+    """
+    Cria os endereços e contatos do lote que o cliente ainda não possui.
+    """
+    client_ids = {c.pk for c in clients}
+    known_addresses = {
+        (client_id, *values)
+        for client_id, *values in ClientAddress.objects.filter(client_id__in=client_ids)
+        .values_list('client_id', *ADDRESS_FIELDS, 'city_id')
+    }
+    known_contacts = set(
+        ClientContact.objects.filter(client_id__in=client_ids).values_list('client_id', 'contact_type_id', 'value')
+    )
+
+    addresses, contacts = [], []
+    for (_line, _values, address, record_contacts), client in zip(records, clients, strict=True):
+        if address:
+            key = (client.pk, *_address_key(address))
+            if key not in known_addresses:
+                known_addresses.add(key)
+                addresses.append(ClientAddress(client_id=client.pk, **address))
+        for type_id, value in record_contacts:
+            key = (client.pk, type_id, value)
+            if key not in known_contacts:
+                known_contacts.add(key)
+                contacts.append(ClientContact(client_id=client.pk, contact_type_id=type_id, value=value))
+
+    ClientAddress.objects.bulk_create(addresses)
+    ClientContact.objects.bulk_create(contacts)
+    stats['addresses'] += len(addresses)
+    stats['contacts'] += len(contacts)
+
+
+def import_clients(  # noqa: PLR0913 (opções da carga; o comando as repassa por nome)
+    rows, contact_columns=None, batch_size=IMPORT_BATCH_SIZE, on_error=None, on_progress=None, *,
+    require_document=True,
+):
+    """
+    Importa os clientes de um iterável de (linha, dicionário) (ver iter_import_rows).
+
+    Parâmetros:
+    - contact_columns: coluna do arquivo -> id do tipo de contato.
+    - require_document: rejeita as linhas sem CPF/CNPJ. Com False elas são inseridas
+      como clientes novos a cada importação (contadas em 'without_document').
+    - on_error(linha, dados originais, motivo): chamado para cada linha rejeitada.
+    - on_progress(stats): chamado ao fim de cada lote.
+
+    Retorna um Counter com: read, created, updated, duplicates, errors,
+    without_document, addresses e contacts.
+    """
+    contact_columns = contact_columns or {}
+    batch_size = max(1, batch_size)
+    cities = _CityResolver()
+    stats = Counter()
+
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        stats['read'] += len(batch)
+        records, errors = normalize_batch(batch, contact_columns, cities, require_document)
+
+        if records:
+            with transaction.atomic():
+                clients = _upsert_clients(records, stats)
+                _insert_children(records, clients, stats)
+
+        stats['errors'] += len(errors)
+        if on_error:
+            for line, row, reason in errors:
+                on_error(line, row, reason)
+        if on_progress:
+            on_progress(stats)
+
+    return stats
@@ -0,0 +1,137 @@
+# apps/clients/management/commands/bench_normalization.py
+
+import random
+import re
+import time
+import unicodedata
+
+from clients.models import Client, ClientAddress, ClientContact
+from common.contact_types import get_contact_types
+from common.models import AuxContactType
+from common.normalization import MAX_LENGTH_WITHOUT_COUNTRY_CODE
+from django.core.management.base import BaseCommand, CommandError
+
+NAMES = ['José da Silva', 'Maria Conceição', 'João Gonçalves', 'Antônio Araújo', 'Lúcia Ribeiro', 'Pintura Ágil']
+DISTRICTS = ['Centro', 'Savassi', 'Funcionários', 'Santa Efigênia', 'Pampulha', 'Lourdes', 'Barro Preto']
+STREETS = ['Rua São João', 'Av. Afonso Pena', 'Rua da Bahia', 'Av. Amazonas', 'Rua Espírito Santo']
+
+
+def _legacy_search_text(value):
+    if not value:
+        return ''
+    normalized = unicodedata.normalize('NFKD', str(value)).encode('ASCII', 'ignore').decode('utf-8')
+    return re.sub(r'[^A-Z0-9]+', ' ', normalized.upper()).strip()
+
+
+def _legacy_client(client):
+    """
+    Regras como eram escritas dentro do save() (referência para a comparação).
+    """
+    if client.name:
+        normalized = unicodedata.normalize('NFKD', client.name)
+        client.name = normalized.encode('ASCII', 'ignore').decode('utf-8').strip().upper()
+    client.search_name = _legacy_search_text(client.name)
+    if client.fantasy_name:
+        normalized = unicodedata.normalize('NFKD', client.fantasy_name)
+        client.fantasy_name = normalized.encode('ASCII', 'ignore').decode('utf-8').strip().upper()
+    if client.cpf_cnpj:
+        client.cpf_cnpj = re.sub(r'[^0-9]', '', client.cpf_cnpj)
+    if client.rg_ie:
+        client.rg_ie = re.sub(r'[\.\-\/]', '', client.rg_ie).strip().upper()
+
+
+def _legacy_address(address):
+    if address.zip_code:
+        address.zip_code = re.sub(r'[^0-9]', '', address.zip_code)
+
+    def clean_text(text):
+        if not text:
+            return None
+        normalized = unicodedata.normalize('NFKD', text)
+        clean = normalized.encode('ASCII', 'ignore').decode('utf-8')
+        return clean.strip().upper()
+
+    address.street = clean_text(address.street)
+    address.district = clean_text(address.district)
+    address.complement = clean_text(address.complement)
+    address.number = clean_text(address.number)
+
+
+def _legacy_contact(contact):
+    contact.value = contact.value.strip()
+    numbers = re.sub(r'[^0-9]', '', contact.value)
+    if len(numbers) <= MAX_LENGTH_WITHOUT_COUNTRY_CODE:
+        numbers = '55' + numbers
+    contact.value = f"+{numbers}"
+
+
+def _same_fields(a, b):
+    return all(getattr(a, f.attname) == getattr(b, f.attname) for f in type(a)._meta.concrete_fields)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara o custo da normalização feita no save() de clientes, endereços e "
+        "contatos: regras antigas (inline) x módulo common.normalization."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=20000, help="Cadastros simulados (padrão: 20000)")
+
+    def handle(self, *args, **options):
+        phone_type = next(
+            (t.pk for t in get_contact_types().types.values() if t.normalization_kind == AuxContactType.KIND_PHONE_BR),
+            None,
+        )
+        if phone_type is None:
+            raise CommandError("Cadastre um tipo de contato com a padronização 'Telefone Brasil'.")
+
+        rng = random.Random(42)  # noqa: S311 (dados de teste reproduzíveis, sem uso criptográfico)
+        total = max(1, options['records'])
+        data = [
+            (
+                f"{rng.choice(NAMES)} {i}", rng.choice(NAMES), f"{i:011d}", "MG-12.345.678",
+                "30.130-000", rng.choice(STREETS), str(rng.randint(1, 3000)), rng.choice(DISTRICTS),
+                "(31) 99999-0000",
+            )
+            for i in range(total)
+        ]
+
+        def build():
+            return [
+                (
+                    Client(name=name, fantasy_name=fantasy, cpf_cnpj=doc, rg_ie=rg),
+                    ClientAddress(zip_code=cep, street=street, number=number, district=district, complement='Sala 1'),
+                    ClientContact(contact_type_id=phone_type, value=phone),
+                )
+                for name, fantasy, doc, rg, cep, street, number, district, phone in data
+            ]
+
+        def legacy(records):
+            for client, address, contact in records:
+                _legacy_client(client)
+                _legacy_address(address)
+                _legacy_contact(contact)
+
+        def current(records):
+            for client, address, contact in records:
+                client.normalize_fields()
+                address.normalize_fields()
+                contact.normalize_fields()
+
+        results = {}
+        for label, run in (('antes (inline)', legacy), ('atual (módulo)', current)):
+            records = build()
+            started = time.perf_counter()
+            run(records)
+            results[label] = (time.perf_counter() - started) / total * 1e6, records
+            self.stdout.write(f"{label:>16}: {results[label][0]:.2f} µs por cadastro (cliente + endereço + contato)")
+
+        (before, old), (after, new) = results.values()
+        same = all(
+            _same_fields(a, b)
+            for old_record, new_record in zip(old, new, strict=True)
+            for a, b in zip(old_record, new_record, strict=True)
+        )
+        self.stdout.write(f"Redução: {before / after:.1f}x. Resultados idênticos: {'sim' if same else 'NÃO'}")
+
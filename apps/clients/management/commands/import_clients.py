@@ -0,0 +1,142 @@
+# apps/clients/management/commands/import_clients.py
+
+import csv
+import json
+import os
+import tempfile
+import time
+from contextlib import nullcontext
+
+from clients.importer import (
+    IMPORT_BATCH_SIZE,
+    IMPORT_FORMATS,
+    detect_format,
+    import_clients,
+    iter_import_rows,
+)
+from common.contact_types import get_contact_types
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+# Coluna do CSV de erros com o texto da linha que não pôde ser lida (JSON inválido)
+RAW_COLUMN = 'conteudo_original'
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa clientes em lote de um arquivo CSV, XLSX ou JSON Lines (um cliente por "
+        "linha, com endereço e contatos opcionais). Clientes com o mesmo CPF/CNPJ são "
+        "atualizados; linhas inválidas vão para um CSV de erros e a carga continua. "
+        "Linhas sem CPF/CNPJ são rejeitadas, salvo com --allow-missing-document."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Arquivo a importar (.csv, .xlsx ou .jsonl)")
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help="Formato (padrão: pela extensão)")
+        parser.add_argument(
+            '--contact', action='append', default=[], metavar='COLUNA=TIPO',
+            help="Coluna de contato e id do tipo de contato (ex: --contact email=5). Pode repetir.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+            help=f"Linhas por lote/transação (padrão: {IMPORT_BATCH_SIZE})",
+        )
+        parser.add_argument('--errors', help="CSV com as linhas rejeitadas (padrão: <arquivo>.erros.csv)")
+        parser.add_argument(
+            '--allow-missing-document', action='store_true',
+            help="Insere as linhas sem CPF/CNPJ (sem ele, cada nova importação as insere de novo)",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Processa tudo e desfaz ao final, sem gravar no banco",
+        )
+
+    def handle(self, *args, **options):
+        source = options['source']
+        if not os.path.exists(source):
+            raise CommandError(f"Arquivo não encontrado: {source}")
+        try:
+            file_format = options['format'] or detect_format(source)
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+
+        contact_columns = self._contact_columns(options['contact'])
+        errors_path = options['errors'] or f"{os.path.splitext(source)[0]}.erros.csv"
+
+        started = time.perf_counter()
+        # As linhas rejeitadas ficam num arquivo temporário até o fim da carga: o cabeçalho do
+        # CSV de erros é a união das colunas de todas elas (linhas JSON podem ter chaves diferentes)
+        error_columns = {}
+
+        def on_error(line, row, reason):
+            values = {RAW_COLUMN if k == '__raw__' else k: v for k, v in row.items() if k != '__error__'}
+            error_columns.update(dict.fromkeys(values))
+            pending_errors.write(json.dumps([line, reason, values], default=str) + '\n')
+
+        def on_progress(stats):
+            rate = stats['read'] / max(time.perf_counter() - started, 1e-6)
+            self.stdout.write(
+                f"{stats['read']} linhas: {stats['created']} novos, {stats['updated']} atualizados, "
+                f"{stats['errors']} com erro ({rate:.0f} linhas/s)"
+            )
+
+        # Cada lote é gravado na sua própria transação; a simulação envolve tudo em uma só para desfazer
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as pending_errors:
+            try:
+                with transaction.atomic() if options['dry_run'] else nullcontext():
+                    stats = import_clients(
+                        iter_import_rows(source, file_format),
+                        contact_columns=contact_columns,
+                        batch_size=options['batch_size'],
+                        on_error=on_error,
+                        on_progress=on_progress,
+                        require_document=not options['allow_missing_document'],
+                    )
+                    if options['dry_run']:
+                        transaction.set_rollback(True)
+            finally:
+                if pending_errors.tell():
+                    self._write_errors(pending_errors, error_columns, errors_path)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Clientes: {stats['created']} novos, {stats['updated']} atualizados "
+            f"({stats['duplicates']} repetidos no arquivo). "
+            f"Endereços: {stats['addresses']}. Contatos: {stats['contacts']}."
+        )
+        if stats['without_document']:
+            self.stdout.write(self.style.WARNING(
+                f"{stats['without_document']} clientes sem CPF/CNPJ inseridos: "
+                "importar o arquivo de novo os inseriria outra vez."
+            ))
+        if stats['errors']:
+            self.stdout.write(self.style.WARNING(f"{stats['errors']} linhas rejeitadas: veja {errors_path}"))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Simulação concluída em {elapsed:.2f}s (nada gravado)."))
+            return
+        self.stdout.write(self.style.SUCCESS(f"✅ Importação concluída em {elapsed:.2f}s."))
+
+    @staticmethod
+    def _write_errors(pending_errors, columns, path):
+        pending_errors.seek(0)
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.DictWriter(f, fieldnames=['linha', 'erro', *columns], delimiter=';')
+            writer.writeheader()
+            for text in pending_errors:
+                line, reason, values = json.loads(text)
+                writer.writerow({**values, 'linha': line, 'erro': reason})
+
+    def _contact_columns(self, specs):
+        columns = {}
+        for spec in specs:
+            column, _sep, type_id = spec.partition('=')
+            if not column or not type_id.isdigit():
+                raise CommandError(f"Contato inválido: '{spec}'. Use COLUNA=ID_DO_TIPO.")
+            columns[column.strip()] = int(type_id)
+
+        registry = get_contact_types()
+        unknown = sorted({type_id for type_id in columns.values() if registry.get(type_id) is None})
+        if unknown:
+            raise CommandError(f"Tipos de contato inexistentes: {', '.join(map(str, unknown))}.")
+        return columns
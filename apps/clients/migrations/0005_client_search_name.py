@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-18 16:10
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+_NON_ALNUM = re.compile(r'[^A-Z0-9]+')
+
+
+def normalize_search_text(value):
+    """
+    Cópia congelada de common.normalization.normalize_search_text (na data desta
+    migração): a migração não deve mudar de resultado se o módulo evoluir.
+    """
+    if not value:
+        return ''
+    folded = unicodedata.normalize('NFKD', str(value)).encode('ASCII', 'ignore').decode('utf-8')
+    return _NON_ALNUM.sub(' ', folded.upper()).strip()
+
+
+def populate_search_name(apps, schema_editor):
+    Client = apps.get_model('clients', 'Client')
+
+    batch = []
+    for client in Client.objects.only('id', 'name').iterator(chunk_size=2000):
+        client.search_name = normalize_search_text(client.name)
+        batch.append(client)
+        if len(batch) >= 2000:
+            Client.objects.bulk_update(batch, ['search_name'])
+            batch = []
+
+    if batch:
+        Client.objects.bulk_update(batch, ['search_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_alter_client_cpf_cnpj'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255, verbose_name='Nome (Busca)'),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='cpf_cnpj',
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True, verbose_name='CPF/CNPJ'),
+        ),
+        migrations.RunPython(populate_search_name, migrations.RunPython.noop),
+    ]
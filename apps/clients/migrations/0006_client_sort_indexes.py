@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-18 16:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0005_client_search_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='client',
+            name='name',
+            field=models.CharField(db_index=True, max_length=255, verbose_name='Nome / Razão Social'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['idle'], name='clients_idle_idx'),
+        ),
+    ]
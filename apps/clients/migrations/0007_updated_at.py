@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0006_client_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+    ]
@@ -1,9 +1,7 @@
 # apps/clients/models.py
 
-import re
-import unicodedata
-
 from common.models import AddressBase, ContactBase, IdleBase, NoteBase
+from common.normalization import clean_rg_ie, clean_upper_text, normalize_search_text, only_digits
 from django.db import models
 from django.db.models import Q
 
@@ -20,6 +18,7 @@ class Client(IdleBase):
 
     name = models.CharField(
         max_length=255,
+        db_index=True,
         verbose_name="Nome / Razão Social"
     )
     fantasy_name = models.CharField(
@@ -38,6 +37,7 @@ class Client(IdleBase):
         max_length=20,
         blank=True,
         null=True,
+        db_index=True,
         verbose_name="CPF/CNPJ"
     )
     rg_ie = models.CharField(
@@ -46,12 +46,26 @@ class Client(IdleBase):
         null=True,
         verbose_name="RG / Inscrição Estadual"
     )
+    # Chave de busca indexada (nome sem acentos/pontuação, caixa alta).
+    # Preenchida automaticamente no save(); permite busca por prefixo usando índice.
+    search_name = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False,
+        verbose_name="Nome (Busca)"
+    )
 
     class Meta:
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         db_table = "clients"
         ordering = ['name']
+        # Colunas ordenáveis da listagem (o InnoDB inclui a pk no índice: cobre o desempate por id)
+        indexes = [
+            models.Index(fields=['idle'], name='clients_idle_idx'),
+        ]
 
     constraints = [
             models.UniqueConstraint(
@@ -61,26 +75,25 @@ class Client(IdleBase):
             )
         ]
 
-    def save(self, *args, **kwargs):
-        # Garante que o nome seja salvo em caixa alta
+    def normalize_fields(self):
+        """
+        Padroniza os campos como são gravados (chamado pelo save() e pelas gravações em lote).
+        """
+        # Nomes sem acento e em caixa alta
         if self.name:
-            normalized = unicodedata.normalize('NFKD', self.name)
-            clean_name = normalized.encode('ASCII', 'ignore').decode('utf-8')
-            self.name = clean_name.strip().upper()
-
+            self.name = clean_upper_text(self.name)
+        self.search_name = normalize_search_text(self.name)
         if self.fantasy_name:
-            normalized_fantasy = unicodedata.normalize('NFKD', self.fantasy_name)
-            clean_fantasy = normalized_fantasy.encode('ASCII', 'ignore').decode('utf-8')
-            self.fantasy_name = clean_fantasy.strip().upper()
+            self.fantasy_name = clean_upper_text(self.fantasy_name)
 
-        # Limpeza de CPF/CNPJ (Mantém apenas números)
+        # CPF/CNPJ apenas com números; RG/IE sem pontos, traços e barras
         if self.cpf_cnpj:
-            self.cpf_cnpj = re.sub(r'[^0-9]', '', self.cpf_cnpj)
-
-        # Limpeza de RG/IE (Remove pontos, traços e barras)
+            self.cpf_cnpj = only_digits(self.cpf_cnpj)
         if self.rg_ie:
-            self.rg_ie = re.sub(r'[\.\-\/]', '', self.rg_ie).strip().upper()
+            self.rg_ie = clean_rg_ie(self.rg_ie)
 
+    def save(self, *args, **kwargs):
+        self.normalize_fields()
         super().save(*args, **kwargs)
 
     def __str__(self):
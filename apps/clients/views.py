@@ -1,5 +1,9 @@
 # apps/clients/views.py
 
+from cities.reference import reference_version
+from common.contact_types import contact_types_version
+from common.formsets import save_inline_formset
+from common.pagination import COUNT_ESTIMATED
 from common.views import (
     CommonCreateView,
     CommonDeleteView,
@@ -8,12 +12,13 @@ from common.views import (
     CommonTemplateView,
     CommonUpdateView,
 )
+from django.db import transaction
+from django.db.models import Prefetch
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
-from django.utils.html import format_html
 
 from .forms import ClientAddressFormSet, ClientContactFormSet, ClientForm
-from .models import Client
+from .models import Client, ClientAddress, ClientContact
 
 
 # 1. HOME (Dashboard do Cliente)
@@ -74,6 +79,14 @@ class ClientHomeView(CommonTemplateView):
 class ClientListView(CommonListView):
     model = Client
     title = "Listagem de Clientes"
+    count_strategy = COUNT_ESTIMATED
+
+    # Apenas as colunas exibidas na tabela, lidas como tuplas (caminho rápido)
+    list_only_fields = ['id', 'name', 'cpf_cnpj', 'idle']
+    fast_rows = True
+    detail_url_name = 'clients:detail'
+    # Todas as colunas são do próprio cliente: a versão da linha (updated_at) cobre o HTML dela
+    row_cache = True
 
     header_buttons = [
         {
@@ -85,43 +98,46 @@ class ClientListView(CommonListView):
     ]
 
     search_config = [
-        {'name': 'name', 'label': 'Nome', 'type': 'text'},
-        {'name': 'cpf_cnpj', 'label': 'Documento', 'type': 'text'},
+        {'name': 'name', 'label': 'Nome', 'type': 'text', 'search_field': 'search_name', 'normalize': 'text', 'lookup': 'words'},
+        {'name': 'cpf_cnpj', 'label': 'Documento', 'type': 'text', 'normalize': 'digits', 'lookup': 'prefix'},
         {'name': 'idle', 'label': 'Inativo?', 'type': 'select', 'options': [('True', 'Sim'), ('False', 'Não')]}
     ]
 
     table_headers = [
         {'field': 'id', 'label': 'ID'},
-        {'field': 'name', 'label': 'Nome'},
+        {'field': 'name', 'label': 'Nome', 'link': True},
         {'field': 'cpf_cnpj', 'label': 'Documento'},
-        {'field': 'idle', 'label': 'Inativo?'},
+        {'field': 'idle', 'label': 'Inativo?', 'display': {True: 'Sim', False: 'Não'}},
     ]
 
-    def get_row_data(self, item):
-        detail_url = reverse_lazy('clients:detail', args=[item.pk])
-        status = "Sim" if item.idle else "Não"
-
-        return [
-            item.id,
-            format_html('<a href="{}">{}</a>', detail_url, item.name),
-            item.cpf_cnpj,
-            status,
-        ]
-
 # 3. DETALHES
 class ClientDetailView(CommonDetailView):
     model = Client
     return_url = reverse_lazy('clients:list')
 
+    # Endereços (com cidade/UF) e contatos (com tipo) em uma consulta cada
+    detail_prefetch_related = [
+        Prefetch('addresses', queryset=ClientAddress.objects.select_related('city__uf')),
+        Prefetch('contacts', queryset=ClientContact.objects.select_related('contact_type')),
+    ]
+
+    def get_related_versions(self):
+        # Nomes de cidade/UF e de tipos de contato exibidos nas abas
+        return [reference_version(), contact_types_version()]
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         client = self.object
 
+        # Listas já carregadas pelo prefetch: as contagens das abas saem delas
+        addresses = list(client.addresses.all())
+        contacts = list(client.contacts.all())
+
         # ABAS (Tabs)
         context['tabs'] = [
             {'id': 'tab-dados', 'label': 'Dados Cadastrais', 'icon': 'fas fa-user', 'active': True},
-            {'id': 'tab-enderecos', 'label': f'Endereços ({client.addresses.count()})', 'icon': 'fas fa-map-marker-alt'},
-            {'id': 'tab-contatos', 'label': f'Contatos ({client.contacts.count()})', 'icon': 'fas fa-address-book'},
+            {'id': 'tab-enderecos', 'label': f'Endereços ({len(addresses)})', 'icon': 'fas fa-map-marker-alt'},
+            {'id': 'tab-contatos', 'label': f'Contatos ({len(contacts)})', 'icon': 'fas fa-address-book'},
             {'id': 'tab-orcamentos', 'label': 'Orçamentos', 'icon': 'fas fa-file-invoice-dollar'},
         ]
 
@@ -149,8 +165,8 @@ class ClientDetailView(CommonDetailView):
                 'is_table': True,
                 'table_headers': ['Cidade', 'Logradouro', 'Bairro', 'CEP'],
                 'fields': [
-                    {'values': [addr.city, f"{addr.street}, {addr.number}", addr.district, addr.zip_code]}
-                    for addr in client.addresses.all()
+                    {'values': [addr.city_label, f"{addr.street}, {addr.number}", addr.district, addr.zip_code]}
+                    for addr in addresses
                 ]
             },
             # Aba 3: Contatos (Tabela)
@@ -161,7 +177,7 @@ class ClientDetailView(CommonDetailView):
                 'table_headers': ['Tipo', 'Contato', 'Observação'],
                 'fields': [
                     {'values': [ct.contact_type, ct.value, ct.notes]}
-                    for ct in client.contacts.all()
+                    for ct in contacts
                 ]
             },
             # Aba 4: Orçamentos (Implantação Futura)
@@ -173,8 +189,46 @@ class ClientDetailView(CommonDetailView):
         ]
         return context
 
+# Cliente + endereços + contatos (compartilhado por CRIAR e EDITAR)
+class ClientFormsetsMixin:
+    """
+    Cliente + formsets de endereços e contatos gravados como uma unidade.
+
+    Os formsets são montados uma única vez por requisição: o form_valid valida
+    e, em caso de erro, a mesma instância (com os erros) vai para o template.
+    A gravação é atômica e em lote (common.formsets.save_inline_formset): um
+    cliente com muitos endereços custa um punhado de consultas.
+    """
+    formset_classes = {
+        'address_formset': ClientAddressFormSet,
+        'contact_formset': ClientContactFormSet,
+    }
+
+    def get_formsets(self):
+        if getattr(self, '_formsets', None) is None:
+            data = self.request.POST if self.request.method == 'POST' else None
+            self._formsets = {
+                name: formset_class(data, instance=self.object)
+                for name, formset_class in self.formset_classes.items()
+            }
+        return self._formsets
+
+    def form_valid(self, form):
+        formsets = self.get_formsets()
+        # Valida todos (sem parar no primeiro) para exibir os erros de cada aba
+        valid = [formset.is_valid() for formset in formsets.values()]
+        if not all(valid):
+            return self.form_invalid(form)
+
+        with transaction.atomic():
+            self.object = form.save()
+            for formset in formsets.values():
+                save_inline_formset(formset, self.object)
+
+        return redirect(self.success_url)
+
 # 4. CRIAR (Novo Cliente)
-class ClientCreateView(CommonCreateView):
+class ClientCreateView(ClientFormsetsMixin, CommonCreateView):
     model = Client
     form_class = ClientForm
     success_url = reverse_lazy('clients:list')
@@ -190,13 +244,8 @@ class ClientCreateView(CommonCreateView):
         if not main_form:
             main_form = self.get_form()
 
-        # Inicializa formsets vazios ou com POST data
-        if self.request.POST:
-            context['address_formset'] = ClientAddressFormSet(self.request.POST)
-            context['contact_formset'] = ClientContactFormSet(self.request.POST)
-        else:
-            context['address_formset'] = ClientAddressFormSet()
-            context['contact_formset'] = ClientContactFormSet()
+        # Formsets vazios ou com POST data (os mesmos já validados no form_valid)
+        context.update(self.get_formsets())
 
         # Definição das Abas para o Template de Formulário
         context['tabs'] = [
@@ -230,30 +279,8 @@ class ClientCreateView(CommonCreateView):
 
         return context
 
-    def form_valid(self, form):
-        context = self.get_context_data()
-        address_formset = context['address_formset']
-        contact_formset = context['contact_formset']
-
-        if form.is_valid() and address_formset.is_valid() and contact_formset.is_valid():
-            # 1. Salva o cliente (Pai)
-            self.object = form.save()
-
-            # 2. Salva Endereços
-            address_formset.instance = self.object
-            address_formset.save()
-
-            # 3. Salva Contatos
-            contact_formset.instance = self.object
-            contact_formset.save()
-
-            return redirect(self.success_url)
-        else:
-            # Se der erro, renderiza tudo de novo com os erros visíveis
-            return self.render_to_response(self.get_context_data(form=form))
-
 # 5. EDITAR (Cliente Existente)
-class ClientUpdateView(CommonUpdateView):
+class ClientUpdateView(ClientFormsetsMixin, CommonUpdateView):
     model = Client
     form_class = ClientForm
     success_url = reverse_lazy('clients:list')
@@ -268,13 +295,8 @@ class ClientUpdateView(CommonUpdateView):
         if not main_form:
             main_form = self.get_form()
 
-        # Inicializa formsets com a instância do objeto para carregar dados do banco
-        if self.request.POST:
-            context['address_formset'] = ClientAddressFormSet(self.request.POST, instance=self.object)
-            context['contact_formset'] = ClientContactFormSet(self.request.POST, instance=self.object)
-        else:
-            context['address_formset'] = ClientAddressFormSet(instance=self.object)
-            context['contact_formset'] = ClientContactFormSet(instance=self.object)
+        # Formsets com a instância do objeto (os mesmos já validados no form_valid)
+        context.update(self.get_formsets())
 
         context['tabs'] = [
             {'id': 'tab-dados', 'label': 'Dados Principais', 'active': True},
@@ -303,24 +325,6 @@ class ClientUpdateView(CommonUpdateView):
 
         return context
 
-    def form_valid(self, form):
-        context = self.get_context_data()
-        address_formset = context['address_formset']
-        contact_formset = context['contact_formset']
-
-        if form.is_valid() and address_formset.is_valid() and contact_formset.is_valid():
-            self.object = form.save()
-
-            address_formset.instance = self.object
-            address_formset.save()
-
-            contact_formset.instance = self.object
-            contact_formset.save()
-
-            return redirect(self.success_url)
-        else:
-            return self.render_to_response(self.get_context_data(form=form))
-
 # 6. EXCLUIR
 class ClientDeleteView(CommonDeleteView):
     model = Client
@@ -2,14 +2,14 @@
 
 from django.contrib import admin
 
-from .models import AuxContactType, AuxStatus, AuxUnitMeasure
+from .models import AuxContactType, AuxStatus, AuxUnitMeasure, CepCache
 
 
 @admin.register(AuxContactType)
 class AuxContactTypeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'idle')
+    list_display = ('name', 'normalization_kind', 'idle')
     search_fields = ('name',)
-    list_filter = ('idle',)
+    list_filter = ('idle', 'normalization_kind')
 
 @admin.register(AuxStatus)
 class AuxStatusAdmin(admin.ModelAdmin):
@@ -22,3 +22,9 @@ class AuxUnitMeasureAdmin(admin.ModelAdmin):
     list_display = ('code', 'name', 'idle')
     search_fields = ('code', 'name')
     list_filter = ('idle',)
+
+@admin.register(CepCache)
+class CepCacheAdmin(admin.ModelAdmin):
+    list_display = ('cep', 'status', 'fetched_at')
+    search_fields = ('cep',)
+    list_filter = ('status',)
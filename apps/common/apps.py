@@ -5,3 +5,8 @@ from django.apps import AppConfig
 
 class CommonConfig(AppConfig):
     name = 'common'
+
+    def ready(self):
+        # Registra as checagens de sistema das views genéricas (ex: common.W001)
+        # e os signals de invalidação do registro de tipos de contato
+        from . import checks, signals  # noqa: PLC0415 (apps carregados só no ready)
@@ -0,0 +1,189 @@
+# apps/common/cep_client.py
+
+"""
+Cliente HTTP compartilhado da BrasilAPI (CEP).
+
+- Pool de conexões: uma única requests.Session por processo, reaproveitando
+  conexões TCP/TLS entre as consultas.
+- Coalescência: consultas simultâneas do mesmo CEP compartilham uma única
+  chamada à API (entre threads do WSGI e entre tarefas do ASGI).
+- Circuit breaker: após falhas consecutivas, a API deixa de ser chamada por
+  alguns segundos e as consultas falham imediatamente, sem prender workers.
+
+O projeto não depende de um cliente HTTP assíncrono: afetch() executa a mesma
+Session em um executor próprio, com tantas threads quanto conexões no pool,
+de modo que o event loop nunca bloqueia e as conexões continuam reaproveitadas.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .models import CepCache
+
+logger = logging.getLogger(__name__)
+
+BRASILAPI_CEP_URL = "https://brasilapi.com.br/api/cep/v2/{cep}"
+
+ERRO_SERVICO_INDISPONIVEL = {"erro": "Serviço de CEP indisponível no momento."}
+ERRO_DESCONHECIDO = {"erro": "Erro desconhecido ao buscar CEP."}
+
+
+class CepServiceError(Exception):
+    """
+    Falha ao consultar a BrasilAPI (rede, timeout, resposta inesperada ou circuito aberto).
+    """
+    def __init__(self, resultado):
+        super().__init__(resultado["erro"])
+        self.resultado = resultado
+
+
+class CircuitBreaker:
+    """
+    Disjuntor simples: abre após 'failure_threshold' falhas seguidas e,
+    passados 'reset_timeout' segundos, libera uma tentativa (meio-aberto).
+    Sucesso fecha o circuito; nova falha o reabre.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow_request(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Meio-aberto: deixa passar uma tentativa e rearma o prazo
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("BrasilAPI: circuito aberto após falhas consecutivas")
+                self._opened_at = time.monotonic()
+
+
+class BrasilApiClient:
+    """
+    Cliente da BrasilAPI com pool de conexões, coalescência e circuit breaker.
+    """
+
+    def __init__(self, timeout=5, pool_size=10, failure_threshold=5, reset_timeout=30):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        # Consultas das views assíncronas: uma thread por conexão do pool
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="brasilapi")
+
+        self._lock = threading.Lock()
+        self._inflight = {}        # cep -> concurrent.futures.Future (threads)
+        self._inflight_async = {}  # (loop, cep) -> asyncio.Task (tarefas ASGI)
+
+    def _request(self, cep):
+        if not self.breaker.allow_request():
+            raise CepServiceError(ERRO_SERVICO_INDISPONIVEL)
+
+        try:
+            response = self.session.get(BRASILAPI_CEP_URL.format(cep=cep), timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            self.breaker.record_failure()
+            logger.error(f"Erro de conexão na busca de CEP: {e}")
+            raise CepServiceError(ERRO_SERVICO_INDISPONIVEL) from e
+
+        if response.status_code == HTTPStatus.OK:
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = None
+            if not isinstance(payload, dict):
+                # Corpo malformado (ex: página de erro de um proxy com status 200)
+                self.breaker.record_failure()
+                logger.error(f"Resposta inválida da BrasilAPI para o CEP {cep}")
+                raise CepServiceError(ERRO_DESCONHECIDO)
+            self.breaker.record_success()
+            return CepCache.STATUS_FOUND, payload
+        if response.status_code == HTTPStatus.NOT_FOUND:
+            self.breaker.record_success()
+            return CepCache.STATUS_NOT_FOUND, None
+
+        if response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+            self.breaker.record_failure()
+        logger.error(f"Resposta inesperada da BrasilAPI para o CEP {cep}: {response.status_code}")
+        raise CepServiceError(ERRO_DESCONHECIDO)
+
+    def fetch(self, cep):
+        """
+        Consulta o CEP e retorna (status, payload). Levanta CepServiceError.
+        Threads que pedem o mesmo CEP ao mesmo tempo aguardam a mesma chamada.
+        """
+        with self._lock:
+            future = self._inflight.get(cep)
+            leader = future is None
+            if leader:
+                future = self._inflight[cep] = Future()
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._request(cep)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(cep, None)
+
+    async def afetch(self, cep):
+        """
+        Versão assíncrona de fetch(): não bloqueia o event loop e coalesce
+        as tarefas que pedem o mesmo CEP em uma única chamada.
+        """
+        loop = asyncio.get_running_loop()
+        key = (loop, cep)
+
+        task = self._inflight_async.get(key)
+        if task is None:
+            task = asyncio.ensure_future(loop.run_in_executor(self._executor, self.fetch, cep))
+            self._inflight_async[key] = task
+            task.add_done_callback(lambda _: self._inflight_async.pop(key, None))
+
+        # shield: o cancelamento de um cliente não cancela a consulta dos demais
+        return await asyncio.shield(task)
+
+
+brasilapi = BrasilApiClient(
+    timeout=getattr(settings, 'CEP_API_TIMEOUT', 5),
+    failure_threshold=getattr(settings, 'CEP_CIRCUIT_FAILURES', 5),
+    reset_timeout=getattr(settings, 'CEP_CIRCUIT_RESET_TIMEOUT', 30),
+)
@@ -0,0 +1,132 @@
+# apps/common/cep_index.py
+
+"""
+Índice offline de faixas de CEP -> cidade (código IBGE).
+
+Cada cidade possui uma ou mais faixas contíguas de CEP, então o mapeamento
+CEP -> cidade é resolvido localmente, sem rede. Apenas os dados de rua
+(logradouro, bairro) ainda dependem da BrasilAPI.
+
+Formato do arquivo (gerado pelo comando 'build_cep_index'):
+    Cabeçalho: b'CEPR' + versão (uint16) + quantidade de faixas (uint32)
+    Faixas:    (cep_inicial, cep_final, city_id) como 3 x uint32, little-endian,
+               ordenadas por cep_inicial e sem sobreposição.
+
+O arquivo é mapeado em memória (mmap): a carga é instantânea, as páginas são
+compartilhadas entre os workers pelo sistema operacional e cada consulta é uma
+busca binária de ~15 passos.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CEP_LENGTH = 8
+
+MAGIC = b'CEPR'
+VERSION = 1
+HEADER = struct.Struct('<4sHI')
+RECORD = struct.Struct('<III')
+
+_lock = threading.Lock()
+_index = None
+_index_loaded = False
+
+
+class CepRangeIndex:
+    """
+    Índice somente-leitura sobre um arquivo de faixas de CEP.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"Arquivo de faixas de CEP inválido: {path}")
+        if len(self._mm) != HEADER.size + self.count * RECORD.size:
+            self._mm.close()
+            raise ValueError(f"Arquivo de faixas de CEP truncado: {path}")
+
+    def __len__(self):
+        return self.count
+
+    def _record(self, position):
+        return RECORD.unpack_from(self._mm, HEADER.size + position * RECORD.size)
+
+    def lookup(self, cep):
+        """
+        Retorna o city_id (código IBGE) da faixa que contém o CEP, ou None.
+        """
+        try:
+            value = int(cep)
+        except (TypeError, ValueError):
+            return None
+
+        # Busca binária pela última faixa com cep_inicial <= value
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self._record(mid)[0] <= value:
+                low = mid + 1
+            else:
+                high = mid
+
+        if low == 0:
+            return None
+        start, end, city_id = self._record(low - 1)
+        return city_id if start <= value <= end else None
+
+    def close(self):
+        self._mm.close()
+
+
+def write_cep_index(path, ranges):
+    """
+    Grava o arquivo do índice de forma atômica (arquivo temporário + rename).
+    'ranges' deve estar ordenado por cep_inicial e sem sobreposição.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(ranges)))
+        for start, end, city_id in ranges:
+            f.write(RECORD.pack(start, end, city_id))
+    os.replace(tmp_path, path)
+
+
+def get_cep_index():
+    """
+    Retorna o índice do processo (carregado uma única vez) ou None se o
+    arquivo configurado em CEP_RANGE_INDEX_PATH não existir.
+    """
+    global _index, _index_loaded  # noqa: PLW0603
+
+    if not _index_loaded:
+        with _lock:
+            if not _index_loaded:
+                path = getattr(settings, 'CEP_RANGE_INDEX_PATH', None)
+                if path and os.path.exists(path):
+                    try:
+                        _index = CepRangeIndex(path)
+                    except (OSError, ValueError) as e:
+                        logger.error(f"Índice de faixas de CEP não carregado: {e}")
+                _index_loaded = True
+    return _index
+
+
+def cidade_id_por_cep(cep):
+    """
+    Resolve o código IBGE da cidade de um CEP (8 dígitos) sem acesso à rede.
+    Retorna None se o índice não estiver disponível ou o CEP não estiver coberto.
+    """
+    index = get_cep_index()
+    return index.lookup(cep) if index else None
@@ -0,0 +1,95 @@
+# apps/common/checks.py
+
+"""
+Checagens de sistema (python manage.py check) das views genéricas.
+
+common.W001: coluna ordenável de uma listagem (CommonListView) sem índice no banco.
+Ordenar por ela obriga o banco a ordenar a tabela inteira (filesort) a cada página.
+"""
+
+from django.core.checks import Warning, register
+from django.core.exceptions import FieldDoesNotExist
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from .views import CommonListView
+
+
+def _iter_view_classes(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _iter_view_classes(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if view_class is not None:
+                yield view_class
+
+
+def _resolve_field(model, path):
+    """
+    Resolve 'campo' ou 'relacao__campo' até o campo final. None se não for campo de model.
+    """
+    parts = path.split('__')
+    for part in parts[:-1]:
+        try:
+            model = model._meta.get_field(part).related_model
+        except FieldDoesNotExist:
+            return None
+        if model is None:
+            return None
+    try:
+        return model._meta.get_field(parts[-1])
+    except FieldDoesNotExist:
+        return None
+
+
+def _leading_indexed_columns(model):
+    """
+    Campos que são a primeira coluna de algum índice declarado no Meta.
+    """
+    names = set()
+    for index in model._meta.indexes:
+        if index.fields:
+            names.add(index.fields[0].lstrip('-'))
+    for constraint in model._meta.constraints:
+        fields = getattr(constraint, 'fields', None)
+        if fields and getattr(constraint, 'condition', None) is None:
+            names.add(fields[0])
+    for fields in model._meta.unique_together:
+        names.add(fields[0])
+    return names
+
+
+def is_indexed(field):
+    if field.primary_key or field.unique or field.db_index:
+        return True
+    return field.name in _leading_indexed_columns(field.model)
+
+
+@register()
+def check_list_ordering_indexes(app_configs, **kwargs):
+    warnings = []
+    seen = set()
+    for view_class in _iter_view_classes(get_resolver().url_patterns):
+        if view_class in seen or not issubclass(view_class, CommonListView) or view_class.model is None:
+            continue
+        seen.add(view_class)
+        if app_configs is not None and view_class.model._meta.app_config not in app_configs:
+            continue
+
+        view = view_class()
+        for path in view.get_sortable_fields():
+            field = _resolve_field(view_class.model, path)
+            # Anotações (list_annotations) não são colunas e não podem ter índice
+            if field is None or not getattr(field, 'concrete', False):
+                continue
+            if not is_indexed(field):
+                warnings.append(Warning(
+                    f"A coluna ordenável '{path}' de {view_class.__name__} não possui índice no banco.",
+                    hint=(
+                        f"Adicione db_index=True (ou um Meta.indexes) em {field.model.__name__}.{field.name}, "
+                        "ou marque a coluna com 'sortable': False no table_headers."
+                    ),
+                    obj=view_class,
+                    id='common.W001',
+                ))
+    return warnings
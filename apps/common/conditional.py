@@ -0,0 +1,88 @@
+# apps/common/conditional.py
+
+"""
+GET condicional (ETag / Last-Modified) das views genéricas.
+
+A versão de um registro é a coluna 'updated_at' (IdleBase, auto_now). Antes de
+montar a resposta, a view consulta apenas essa versão:
+- Detalhe: updated_at do objeto (1 consulta simples, sem prefetch) + versões
+  dos dados de referência exibidos na página (get_related_versions).
+- Listagem: versão da tabela inteira (table_version): maior updated_at, lido
+  pelo índice da coluna, + contador de exclusões no cache (que não deixam
+  rastro em updated_at). Sem COUNT(*) nem agregação sobre o queryset filtrado:
+  qualquer alteração na tabela muda a versão de todas as listagens dela.
+
+Se o navegador já tiver a mesma versão (If-None-Match / If-Modified-Since),
+a resposta é 304 sem executar as consultas das linhas nem renderizar templates.
+O ETag também leva a URL completa e o usuário, pois o HTML varia com eles.
+"""
+
+import hashlib
+
+from django.contrib import messages
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+VERSION_FIELD = 'updated_at'
+
+
+def has_change_tracking(model):
+    return any(field.name == VERSION_FIELD for field in model._meta.concrete_fields)
+
+
+def _deletions_key(model):
+    return f"common:deletions:{model._meta.label_lower}"
+
+
+def record_deletion(model):
+    """
+    Incrementa o contador de exclusões da tabela (chamado pelos signals, após o commit).
+    """
+    key = _deletions_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def table_version(model):
+    """
+    Versão barata de uma tabela: (maior updated_at, exclusões registradas).
+    O MAX de uma coluna indexada é resolvido pelo índice, sem percorrer as linhas.
+    """
+    last = model._base_manager.order_by().aggregate(last=Max(VERSION_FIELD))['last']
+    return last, cache.get(_deletions_key(model), 0)
+
+
+def make_etag(request, *parts):
+    user_id = getattr(request.user, 'pk', None)
+    raw = '|'.join(str(p) for p in (request.get_full_path(), user_id, *parts))
+    return f'"{hashlib.sha1(raw.encode()).hexdigest()}"'  # noqa: S324 (não é uso criptográfico)
+
+
+def can_use_conditional(request):
+    """
+    Mensagens pendentes (django.contrib.messages) seriam perdidas num 304.
+    """
+    return request.method in ('GET', 'HEAD') and not len(messages.get_messages(request))
+
+
+def not_modified_response(request, etag, last_modified):
+    """
+    Retorna a resposta 304 se o cliente já possui esta versão, ou None.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_conditional_headers(response, etag, last_modified):
+    """
+    Publica a versão na resposta e obriga o navegador a revalidar a cada uso.
+    """
+    response.headers['ETag'] = etag
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
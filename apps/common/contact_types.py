@@ -0,0 +1,106 @@
+# apps/common/contact_types.py
+
+"""
+Registro dos tipos de contato (aux_contact_type) em memória do processo.
+
+Os tipos de contato são poucos e quase nunca mudam, mas são consultados a
+cada contato gravado (regra de padronização do valor) e a cada formulário de
+contato renderizado (opções do select). O processo mantém um retrato imutável
+da tabela, montado com uma consulta:
+    ContactTypeRegistry.types:  {id: AuxContactType}
+    ContactTypeRegistry.active: {id: AuxContactType} dos não inativos (opções dos formulários)
+
+Ciclo de vida (o mesmo dos dados de referência de cidades, cities.reference):
+- Montado na primeira utilização.
+- Invalidado pelos signals de AuxContactType (signals.py): o retrato local é
+  descartado na hora e uma versão no cache do Django é incrementada para os
+  demais processos, que a conferem no máximo a cada VERSION_CHECK_INTERVAL segundos.
+
+As instâncias guardadas são compartilhadas entre requisições: somente leitura.
+"""
+
+import threading
+import time
+from types import MappingProxyType
+
+from django.apps import apps
+from django.core.cache import cache
+
+VERSION_CACHE_KEY = "common:contact_types:version"
+VERSION_CHECK_INTERVAL = 5
+
+_lock = threading.Lock()
+_registry = None
+_registry_version = None
+_checked_at = 0.0
+
+
+class ContactTypeRegistry:
+    """
+    Retrato imutável (somente leitura) da tabela de tipos de contato.
+    """
+
+    def __init__(self, types):
+        self.types = MappingProxyType({t.pk: t for t in types})
+        self.active = MappingProxyType({t.pk: t for t in types if not t.idle})
+        # Opções dos formulários: apenas os ativos, em ordem alfabética
+        self.choices = tuple((t.pk, t.name) for t in sorted(self.active.values(), key=lambda t: t.name))
+
+    def __repr__(self):
+        return f"<ContactTypeRegistry ({len(self.types)} tipos)>"
+
+    @classmethod
+    def build(cls):
+        AuxContactType = apps.get_model('common', 'AuxContactType')
+        return cls(list(AuxContactType.objects.order_by()))
+
+    def get(self, type_id):
+        return self.types.get(type_id)
+
+    def kind(self, type_id):
+        """
+        Regra de padronização do valor ('phone_br', 'email', 'phone_intl' ou '').
+        """
+        contact_type = self.types.get(type_id)
+        return contact_type.normalization_kind if contact_type else ''
+
+
+def get_contact_types():
+    """
+    Retorna o registro do processo, remontando-o se estiver ausente ou
+    se outro processo tiver sinalizado alteração nos tipos de contato.
+    """
+    global _registry, _registry_version, _checked_at  # noqa: PLW0603
+
+    now = time.monotonic()
+    if _registry is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+        return _registry
+
+    version = cache.get(VERSION_CACHE_KEY, 0)
+    if _registry is None or version != _registry_version:
+        with _lock:
+            if _registry is None or version != _registry_version:
+                _registry = ContactTypeRegistry.build()
+                _registry_version = version
+    _checked_at = now
+    return _registry
+
+
+def contact_types_version():
+    """
+    Versão atual do registro (compõe o ETag das páginas que exibem tipos de contato).
+    """
+    return cache.get(VERSION_CACHE_KEY, 0)
+
+
+def invalidate_contact_types():
+    """
+    Descarta o registro local e avisa os demais processos via cache.
+    """
+    global _registry  # noqa: PLW0603
+
+    _registry = None
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
@@ -0,0 +1,137 @@
+# apps/common/formsets.py
+
+"""
+Gravação em lote de inline formsets (ex: endereços e contatos de um cliente).
+
+O formset.save() do Django grava cada formulário com um INSERT/UPDATE/DELETE
+próprio. Aqui, com o formset já validado, as linhas são separadas em:
+- novas      -> um bulk_create
+- alteradas  -> um bulk_update (colunas do formulário)
+- removidas  -> um delete() filtrado pelo pai
+Formulários sem alteração não geram consulta. Como o bulk não chama o save()
+dos models, a padronização dos campos (normalize_fields) é aplicada aqui.
+
+Deve ser chamado dentro de transaction.atomic(), junto com o save() do pai.
+
+A validação também evita consultas por formulário: BatchInlineFormSet valida
+o campo oculto da pk de cada linha contra os registros que o formset já
+carregou (uma consulta), em vez de um SELECT por linha enviada.
+"""
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.forms.models import BaseInlineFormSet
+from django.utils import timezone
+
+from .conditional import VERSION_FIELD, has_change_tracking
+
+
+class MappedModelChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField validado por um mapa {pk: objeto} já carregado, sem consulta
+    por formulário. O queryset continua definindo as opções renderizadas.
+    """
+
+    def __init__(self, queryset, *, objects, **kwargs):
+        super().__init__(queryset, **kwargs)
+        self.objects = objects
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        model = self.queryset.model
+        if isinstance(value, model):
+            value = value.pk
+        try:
+            return self.objects[model._meta.pk.to_python(value)]
+        except (KeyError, TypeError, ValueError, ValidationError):
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            ) from None
+
+
+class BatchInlineFormSet(BaseInlineFormSet):
+    """
+    Inline formset cuja pk de cada linha é validada pelos registros já carregados do pai.
+    """
+
+    def existing_objects(self):
+        if not hasattr(self, '_existing_objects'):
+            self._existing_objects = {obj.pk: obj for obj in self.get_queryset()}
+        return self._existing_objects
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        pk_name = self.model._meta.pk.name
+        field = form.fields.get(pk_name)
+        if isinstance(field, forms.ModelChoiceField) and not isinstance(field, MappedModelChoiceField):
+            form.fields[pk_name] = MappedModelChoiceField(
+                field.queryset,
+                objects=self.existing_objects(),
+                initial=field.initial,
+                required=field.required,
+                widget=field.widget,
+            )
+
+
+def _classify_forms(formset, parent):
+    """
+    Separa os formulários do formset em (novos, alterados, pks removidas, colunas alteradas).
+    Os novos e alterados já saem vinculados ao pai e padronizados.
+    """
+    model = formset.model
+    fk = formset.fk
+    deleted = {id(form) for form in formset.deleted_forms} if formset.can_delete else set()
+    # Colunas que um bulk_update pode gravar (a pk e o vínculo com o pai não mudam)
+    concrete = {field.name for field in model._meta.concrete_fields if not field.primary_key and field != fk}
+
+    new, changed, removed_pks = [], [], []
+    changed_fields = set()
+    for form in formset.forms:
+        is_existing = form.instance.pk is not None
+        if id(form) in deleted:
+            if is_existing:
+                removed_pks.append(form.instance.pk)
+            continue
+        if not form.has_changed():
+            continue
+
+        obj = form.instance  # já preenchida pela validação do formulário
+        setattr(obj, fk.name, parent)
+        if hasattr(obj, 'normalize_fields'):
+            obj.normalize_fields()
+
+        if is_existing:
+            changed.append(obj)
+            # Todas as colunas do formulário: a padronização pode alterar campos além dos editados
+            changed_fields.update(name for name in form.fields if name in concrete)
+        else:
+            new.append(obj)
+    return new, changed, removed_pks, changed_fields
+
+
+def save_inline_formset(formset, parent):
+    """
+    Grava um inline formset validado (is_valid() == True) vinculado ao registro pai.
+    Retorna a quantidade de linhas criadas, alteradas e removidas.
+    """
+    model = formset.model
+    formset.instance = parent
+    new, changed, removed_pks, changed_fields = _classify_forms(formset, parent)
+
+    if has_change_tracking(model) and (new or changed):
+        now = timezone.now()
+        for obj in (*new, *changed):
+            setattr(obj, VERSION_FIELD, now)
+        changed_fields.add(VERSION_FIELD)
+
+    if removed_pks:
+        model.objects.filter(pk__in=removed_pks, **{formset.fk.name: parent}).delete()
+    if new:
+        model.objects.bulk_create(new)
+    if changed and changed_fields:
+        model.objects.bulk_update(changed, sorted(changed_fields))
+
+    return {'created': len(new), 'updated': len(changed), 'deleted': len(removed_pks)}
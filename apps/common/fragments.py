@@ -0,0 +1,136 @@
+# apps/common/fragments.py
+
+"""
+Cache de fragmentos HTML das listagens.
+
+1. Linhas da tabela: cada <tr> é guardado com a chave
+       (model, assinatura das colunas, pk, versão da linha = updated_at)
+   e uma página só renderiza as linhas que mudaram desde a última vez. A busca
+   é feita em lote (get_many/set_many): uma ida ao cache por página.
+   Linha alterada = nova versão = nova chave; as antigas expiram sozinhas.
+   Na frente das linhas há o corpo da página inteiro (cached_page), com a chave
+   montada pelas versões das linhas exibidas: página sem alteração = uma leitura
+   do cache, sem montar as chaves nem juntar as linhas.
+
+2. Campos de busca: o HTML do formulário é guardado por versão do conjunto de
+   opções (ex: tipos/status vindos do banco) + valores preenchidos.
+
+As estatísticas de acerto/erro ficam em memória do processo (FragmentStats)
+e podem ser consultadas em /common/api/cache-stats/ (apenas equipe).
+"""
+
+import hashlib
+import threading
+
+from django.core.cache import cache
+
+ROW_CACHE_TIMEOUT = 60 * 60
+SEARCH_CACHE_TIMEOUT = 60 * 60
+
+
+class FragmentStats:
+    """
+    Contadores de acertos/erros por tipo de fragmento (thread-safe).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def record(self, namespace, hits=0, misses=0):
+        with self._lock:
+            counter = self._counters.setdefault(namespace, {'hits': 0, 'misses': 0})
+            counter['hits'] += hits
+            counter['misses'] += misses
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for namespace, counter in self._counters.items():
+                total = counter['hits'] + counter['misses']
+                result[namespace] = {
+                    **counter,
+                    'hit_rate': round(counter['hits'] / total, 4) if total else None,
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+stats = FragmentStats()
+
+
+def signature(*parts):
+    """
+    Resumo curto de tudo que influencia o HTML (colunas, URLs, opções, valores).
+    """
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]  # noqa: S324 (não é uso criptográfico)
+
+
+def cached_rows(namespace, rows, key_for, render, timeout=ROW_CACHE_TIMEOUT):
+    """
+    Retorna o HTML de cada linha, renderizando apenas as que não estão no cache.
+
+    Parâmetros:
+    - rows: linhas da página (tuplas ou instâncias).
+    - key_for: linha -> chave do cache (ou None para não guardar a linha).
+    - render: linha -> HTML da linha.
+    """
+    keys = [key_for(row) for row in rows]
+    found = cache.get_many([k for k in keys if k is not None])
+
+    html, missing = [], {}
+    for row, key in zip(rows, keys, strict=True):
+        fragment = found.get(key) if key is not None else None
+        if fragment is None:
+            fragment = render(row)
+            if key is not None:
+                missing[key] = fragment
+        html.append(fragment)
+
+    if missing:
+        cache.set_many(missing, timeout)
+    stats.record(namespace, hits=len(found), misses=len(rows) - len(found))
+    return html
+
+
+def cached_page(namespace, rows, version_for, render, prefix):
+    """
+    Retorna o HTML do corpo da página: inteiro do cache se nenhuma linha mudou,
+    senão montado por cached_rows (só as linhas alteradas são renderizadas).
+
+    Parâmetros:
+    - version_for: linha -> (pk, versão); linhas sem versão não são guardadas.
+    - prefix: prefixo das chaves (modelo + assinatura das colunas).
+    """
+    rows = list(rows)
+    versions = [version_for(row) for row in rows]
+    # Chaves sem espaços (recusados pelo memcached): a versão pode ser o texto de um datetime
+    row_keys = {
+        id(row): f"{prefix}:{pk}:{str(version).replace(' ', 'T')}" if version else None
+        for row, (pk, version) in zip(rows, versions, strict=True)
+    }
+
+    def render_page():
+        return "".join(cached_rows(namespace, rows, lambda row: row_keys[id(row)], render))
+
+    if None in row_keys.values():
+        return render_page()
+    return cached_fragment(f"{namespace}_pages", f"{prefix}:page:{signature(versions)}", render_page, ROW_CACHE_TIMEOUT)
+
+
+def cached_fragment(namespace, key, render, timeout=SEARCH_CACHE_TIMEOUT):
+    """
+    Retorna um fragmento do cache ou o renderiza e guarda.
+    """
+    fragment = cache.get(key)
+    if fragment is not None:
+        stats.record(namespace, hits=1)
+        return fragment
+
+    fragment = render()
+    cache.set(key, fragment, timeout)
+    stats.record(namespace, misses=1)
+    return fragment
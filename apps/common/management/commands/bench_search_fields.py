@@ -0,0 +1,59 @@
+# apps/common/management/commands/bench_search_fields.py
+
+import time
+
+from common.views import CommonListView
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o tempo do formulário de busca das listagens (CommonListView.render_search_fields, "
+        "template includes/search_fields.html) com selects de tamanhos crescentes, sem o cache "
+        "de fragmentos. O custo por opção deve ficar estável (crescimento linear)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='1000,2000,4000,8000,16000,32000',
+            help="Quantidades de opções a medir, separadas por vírgula",
+        )
+        parser.add_argument('--repeat', type=int, default=5, help="Execuções por tamanho (vale a melhor)")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        repeat = max(1, options['repeat'])
+
+        self.stdout.write(f"{'opções':>10} {'tempo (ms)':>12} {'µs/opção':>10}")
+        results = []
+        for size in sizes:
+            view = CommonListView(
+                search_config=[{
+                    'name': 'city',
+                    'label': 'Cidade',
+                    'type': 'select',
+                    'options': [(pk, f"Cidade <{pk}> & Cia") for pk in range(1, size + 1)],
+                }],
+                search_fields_cache=False,
+            )
+            # Opção selecionada no meio da lista: percorre os dois trechos
+            view.setup(RequestFactory().get('/', {'city': size // 2}))
+
+            best = min(self._measure(view) for _ in range(repeat))
+            per_option = best / size * 1e6
+            results.append(per_option)
+            self.stdout.write(f"{size:>10} {best * 1000:>12.2f} {per_option:>10.3f}")
+
+        if len(results) > 1:
+            ratio = results[-1] / results[0]
+            self.stdout.write(
+                f"Custo por opção no maior tamanho / no menor: {ratio:.2f}x "
+                "(≈1 = linear; cresceria com o tamanho se fosse quadrático)"
+            )
+
+    @staticmethod
+    def _measure(view):
+        start = time.perf_counter()
+        view.render_search_fields()
+        return time.perf_counter() - start
@@ -0,0 +1,98 @@
+# apps/common/management/commands/build_cep_index.py
+
+import csv
+import gzip
+import os
+
+from common.cep_index import CEP_LENGTH, write_cep_index
+from common.normalization import only_digits
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+REQUIRED_COLUMNS = ('cep_inicial', 'cep_final', 'ibge')
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera o índice offline de faixas de CEP -> cidade (IBGE) a partir de um "
+        "CSV (opcionalmente .gz) com as colunas cep_inicial, cep_final e ibge."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Caminho do CSV de faixas de CEP (.csv ou .csv.gz)")
+        parser.add_argument(
+            '--output',
+            default=getattr(settings, 'CEP_RANGE_INDEX_PATH', None),
+            help="Arquivo de saída (padrão: settings.CEP_RANGE_INDEX_PATH)",
+        )
+
+    def handle(self, *args, **options):
+        source = options['source']
+        output = options['output']
+        if not output:
+            raise CommandError("Informe --output ou configure CEP_RANGE_INDEX_PATH.")
+        if not os.path.exists(source):
+            raise CommandError(f"Arquivo não encontrado: {source}")
+
+        ranges = self._read_ranges(source)
+        ranges = self._merge(ranges)
+
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        write_cep_index(output, ranges)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Índice gravado em {output} com {len(ranges)} faixas. "
+            "Reinicie os workers para carregá-lo."
+        ))
+
+    def _open(self, path):
+        if path.endswith('.gz'):
+            return gzip.open(path, 'rt', encoding='utf-8', newline='')
+        return open(path, encoding='utf-8', newline='')
+
+    def _read_ranges(self, path):
+        with self._open(path) as f:
+            sample = f.readline()
+            f.seek(0)
+            delimiter = ';' if sample.count(';') > sample.count(',') else ','
+            reader = csv.DictReader(f, delimiter=delimiter)
+
+            missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+            if missing:
+                raise CommandError(f"Colunas ausentes no CSV: {', '.join(missing)}")
+
+            ranges = []
+            for line, row in enumerate(reader, start=2):
+                start = only_digits(row['cep_inicial'])
+                end = only_digits(row['cep_final'])
+                city_id = only_digits(row['ibge'])
+                if len(start) != CEP_LENGTH or len(end) != CEP_LENGTH or not city_id:
+                    raise CommandError(f"Linha {line}: faixa inválida {row}")
+                if int(start) > int(end):
+                    raise CommandError(f"Linha {line}: cep_inicial maior que cep_final")
+                ranges.append((int(start), int(end), int(city_id)))
+
+        ranges.sort()
+        return ranges
+
+    def _merge(self, ranges):
+        """
+        Une faixas contíguas da mesma cidade e rejeita sobreposições.
+        """
+        merged = []
+        for start, end, city_id in ranges:
+            if merged:
+                last_start, last_end, last_city = merged[-1]
+                if start <= last_end:
+                    if city_id != last_city:
+                        raise CommandError(
+                            f"Faixas sobrepostas: {last_start:08d}-{last_end:08d} ({last_city}) "
+                            f"e {start:08d}-{end:08d} ({city_id})"
+                        )
+                    merged[-1] = (last_start, max(last_end, end), city_id)
+                    continue
+                if start == last_end + 1 and city_id == last_city:
+                    merged[-1] = (last_start, end, city_id)
+                    continue
+            merged.append((start, end, city_id))
+        return merged
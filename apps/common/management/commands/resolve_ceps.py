@@ -0,0 +1,86 @@
+# apps/common/management/commands/resolve_ceps.py
+
+import csv
+import sys
+
+from common.cep_index import CEP_LENGTH
+from common.utils import CEP_BATCH_WORKERS, buscar_dados_ceps, limpar_cep
+from django.core.management.base import BaseCommand, CommandError
+
+OUTPUT_COLUMNS = ('cep', 'cidade_id', 'cidade_nome', 'uf', 'logradouro', 'bairro', 'erro')
+
+
+class Command(BaseCommand):
+    help = (
+        "Resolve vários CEPs de uma vez (cache + BrasilAPI em paralelo) e escreve "
+        "um CSV com cidade e logradouro. Os CEPs vêm dos argumentos ou de um "
+        "arquivo (um por linha; em CSV, a primeira coluna, com cabeçalho opcional)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('ceps', nargs='*', help="CEPs a resolver")
+        parser.add_argument('--input', help="Arquivo com os CEPs ('-' para stdin)")
+        parser.add_argument('--output', help="Arquivo CSV de saída (padrão: stdout)")
+        parser.add_argument(
+            '--workers', type=int, default=CEP_BATCH_WORKERS,
+            help=f"Consultas simultâneas à BrasilAPI (padrão: {CEP_BATCH_WORKERS})",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="CEPs resolvidos por lote (padrão: 500)",
+        )
+
+    def handle(self, *args, **options):
+        ceps = list(options['ceps'])
+        if options['input']:
+            ceps += self._read_input(options['input'])
+        if not ceps:
+            raise CommandError("Informe CEPs como argumentos ou via --input.")
+        # Duplicados removidos na entrada inteira (não só dentro de cada lote)
+        ceps = self._distinct(ceps)
+
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            writer = csv.DictWriter(output, fieldnames=OUTPUT_COLUMNS, extrasaction='ignore')
+            writer.writeheader()
+
+            batch_size = max(1, options['batch_size'])
+            total = erros = 0
+            for start in range(0, len(ceps), batch_size):
+                resultados = buscar_dados_ceps(ceps[start:start + batch_size], options['workers'])
+                for cep, resultado in resultados.items():
+                    writer.writerow({'cep': cep, **resultado})
+                    total += 1
+                    erros += 'erro' in resultado
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        self.stderr.write(f"{total} CEPs distintos resolvidos ({erros} com erro).")
+
+    @staticmethod
+    def _distinct(ceps):
+        """
+        CEPs sem repetição, na ordem de entrada: os válidos já limpos (só dígitos),
+        os inválidos como vieram (para aparecerem assim no erro).
+        """
+        distinct = {}
+        for cep in ceps:
+            cep_limpo = limpar_cep(cep)
+            distinct.setdefault(cep_limpo if len(cep_limpo) == CEP_LENGTH else cep, None)
+        return list(distinct)
+
+    def _read_input(self, path):
+        source = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+        try:
+            ceps = []
+            for line, row in enumerate(csv.reader(source)):
+                value = row[0].strip() if row else ''
+                # Cabeçalho (ex: 'cep'): primeira linha sem nenhum dígito
+                if not value or (line == 0 and not limpar_cep(value)):
+                    continue
+                ceps.append(value)
+            return ceps
+        finally:
+            if source is not sys.stdin:
+                source.close()
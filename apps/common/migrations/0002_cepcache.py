@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 17:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CepCache',
+            fields=[
+                ('cep', models.CharField(max_length=8, primary_key=True, serialize=False, verbose_name='CEP')),
+                ('status', models.CharField(choices=[('found', 'Encontrado'), ('not_found', 'Não encontrado')], max_length=10, verbose_name='Situação')),
+                ('payload', models.JSONField(blank=True, null=True, verbose_name='Resposta da API')),
+                ('fetched_at', models.DateTimeField(verbose_name='Consultado em')),
+            ],
+            options={
+                'verbose_name': 'CEP em Cache',
+                'verbose_name_plural': 'CEPs em Cache',
+                'db_table': 'cep_cache',
+            },
+        ),
+    ]
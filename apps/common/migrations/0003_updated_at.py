@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_cepcache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auxcontacttype',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+        migrations.AddField(
+            model_name='auxstatus',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+        migrations.AddField(
+            model_name='auxunitmeasure',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+    ]
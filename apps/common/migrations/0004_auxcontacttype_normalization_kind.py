@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 16:39
+
+from django.db import migrations, models
+
+# Regras que antes ficavam fixas no ContactBase.save(), pelos IDs da tabela aux_contact_type:
+# 1: Tel Residencial, 2: Tel Comercial, 3: Cel Pessoal, 4: Cel Corporativo,
+# 5: Email Pessoal, 6: Email Corporativo, 7: Telefone Exterior
+LEGACY_KINDS = {
+    'phone_br': [1, 2, 3, 4],
+    'email': [5, 6],
+    'phone_intl': [7],
+}
+
+
+def set_legacy_kinds(apps, schema_editor):
+    AuxContactType = apps.get_model('common', 'AuxContactType')
+    for kind, ids in LEGACY_KINDS.items():
+        AuxContactType.objects.filter(pk__in=ids).update(normalization_kind=kind)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auxcontacttype',
+            name='normalization_kind',
+            field=models.CharField(blank=True, choices=[('', 'Nenhuma (apenas remove espaços)'), ('phone_br', 'Telefone Brasil (+55DDDNUMERO)'), ('email', 'E-mail (minúsculas)'), ('phone_intl', 'Telefone Exterior (+DIGITOS)')], default='', max_length=20, verbose_name='Padronização do Valor'),
+        ),
+        migrations.RunPython(set_legacy_kinds, migrations.RunPython.noop),
+    ]
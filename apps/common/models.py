@@ -1,10 +1,10 @@
 # apps/common/models.py
 
-import re
-import unicodedata
-
 from django.db import models
 
+from .contact_types import get_contact_types
+from .normalization import clean_upper_text, normalize_contact_value, only_digits
+
 
 class NoteBase(models.Model):
     """
@@ -18,7 +18,9 @@ class NoteBase(models.Model):
 
 class IdleBase(NoteBase):
     """
-    Nível 2: Observações + Inativo (Idle).
+    Nível 2: Observações + Inativo (Idle) + Data da última alteração.
+    'updated_at' é a versão do registro: alimenta o ETag/Last-Modified das
+    views genéricas (GET condicional).
     """
     SIM_NAO = [
         (False, 'Não'),
@@ -30,6 +32,11 @@ class IdleBase(NoteBase):
         verbose_name="Inativo?",
         choices=SIM_NAO
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name="Atualizado em"
+    )
 
     class Meta:
         abstract = True
@@ -38,9 +45,28 @@ class IdleBase(NoteBase):
 class AuxContactType(IdleBase):
     """
     Tipos de contato (Ex: E-mail, WhatsApp, Telefone).
+    'normalization_kind' define como o valor do contato é gravado
+    (ver common.normalization.CONTACT_NORMALIZERS e common.contact_types).
     Tabela: aux_contact_type
     """
+    KIND_PHONE_BR = 'phone_br'
+    KIND_EMAIL = 'email'
+    KIND_PHONE_INTL = 'phone_intl'
+    KIND_CHOICES = [
+        ('', 'Nenhuma (apenas remove espaços)'),
+        (KIND_PHONE_BR, 'Telefone Brasil (+55DDDNUMERO)'),
+        (KIND_EMAIL, 'E-mail (minúsculas)'),
+        (KIND_PHONE_INTL, 'Telefone Exterior (+DIGITOS)'),
+    ]
+
     name = models.CharField(max_length=255, unique=True, verbose_name="Nome")
+    normalization_kind = models.CharField(
+        max_length=20,
+        choices=KIND_CHOICES,
+        blank=True,
+        default='',
+        verbose_name="Padronização do Valor"
+    )
 
     class Meta:
         verbose_name = "Tipo de Contato"
@@ -84,6 +110,34 @@ class AuxUnitMeasure(IdleBase):
         return f"{self.name} ({self.code})"
 
 
+class CepCache(models.Model):
+    """
+    Cache persistente das consultas de CEP à BrasilAPI.
+    Guarda também os CEPs inexistentes (cache negativo) e continua servindo
+    registros vencidos quando a BrasilAPI está fora do ar.
+    Tabela: cep_cache
+    """
+    STATUS_FOUND = 'found'
+    STATUS_NOT_FOUND = 'not_found'
+    STATUS_CHOICES = [
+        (STATUS_FOUND, 'Encontrado'),
+        (STATUS_NOT_FOUND, 'Não encontrado'),
+    ]
+
+    cep = models.CharField(max_length=8, primary_key=True, verbose_name="CEP")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, verbose_name="Situação")
+    payload = models.JSONField(blank=True, null=True, verbose_name="Resposta da API")
+    fetched_at = models.DateTimeField(verbose_name="Consultado em")
+
+    class Meta:
+        verbose_name = "CEP em Cache"
+        verbose_name_plural = "CEPs em Cache"
+        db_table = "cep_cache"
+
+    def __str__(self):
+        return self.cep
+
+
 class AddressBase(models.Model):
     """
     Molde Abstrato para Endereços.
@@ -131,7 +185,7 @@ class AddressBase(models.Model):
 
     def __str__(self):
         # Se tiver rua, mostra rua. Senão, mostra só a cidade/bairro.
-        local = self.city.name
+        local = self.city_name
         if self.district:
             local = f"{self.district} - {local}"
 
@@ -142,26 +196,42 @@ class AddressBase(models.Model):
         return local
 
     def save(self, *args, **kwargs):
-        # 1. Limpeza do CEP (Apenas Números)
-        if self.zip_code:
-            self.zip_code = re.sub(r'[^0-9]', '', self.zip_code)
-
-        # 2. Função auxiliar interna para limpar textos
-        def clean_text(text):
-            if not text:
-                return None
-            normalized = unicodedata.normalize('NFKD', text)
-            clean = normalized.encode('ASCII', 'ignore').decode('utf-8')
-            return clean.strip().upper()
-
-        # Aplica padronização (agora suportando campos vazios)
-        self.street = clean_text(self.street)
-        self.district = clean_text(self.district)
-        self.complement = clean_text(self.complement)
-        self.number = clean_text(self.number)
-
+        self.normalize_fields()
         super().save(*args, **kwargs)
 
+    def _city_reference(self):
+        # O model de cidade (FK 'cities.City') fornece a consulta em memória:
+        # o app common não importa o app cities
+        return self._meta.get_field('city').related_model.reference(self.city_id)
+
+    @property
+    def city_name(self):
+        """
+        Nome da cidade pelos dados de referência em memória (sem consultar o banco).
+        """
+        city = self._city_reference()
+        return city.name if city else self.city.name
+
+    @property
+    def city_label(self):
+        """
+        Cidade no formato "Nome - UF", sem consultar o banco.
+        """
+        city = self._city_reference()
+        return city.label if city else str(self.city)
+
+    def normalize_fields(self):
+        """
+        Padroniza os campos como são gravados (chamado pelo save() e pelas gravações em lote).
+        """
+        # CEP apenas com números; textos sem acento e em caixa alta (vazios viram None)
+        if self.zip_code:
+            self.zip_code = only_digits(self.zip_code)
+        self.street = clean_upper_text(self.street)
+        self.district = clean_upper_text(self.district)
+        self.complement = clean_upper_text(self.complement)
+        self.number = clean_upper_text(self.number)
+
 
 class ContactBase(models.Model):
     """
@@ -185,40 +255,20 @@ class ContactBase(models.Model):
         return f"{self.client}: {self.value}"
 
     def save(self, *args, **kwargs):
-        if self.value:
-            self.value = self.value.strip()
-
-            # IDs baseados na tabela aux_contact_type:
-            # 1: Tel Residencial, 2: Tel Comercial, 3: Cel Pessoal, 4: Cel Corporativo
-            PHONES_BR = [1, 2, 3, 4]
-            # 5: Email Pessoal, 6: Email Corporativo
-            EMAILS = [5, 6]
-            # 7: Telefone Exterior
-            PHONE_EXT = [7]
-
-            # Lógica para Emails
-            if self.contact_type_id in EMAILS:
-                self.value = self.value.lower()
-
-            # Lógica para Telefones Brasil (+55)
-            elif self.contact_type_id in PHONES_BR:
-                # Remove tudo que não for dígito
-                numbers = re.sub(r'[^0-9]', '', self.value)
-
-                # (2 dígitos DDD + 9 dígitos número = 11)
-                MAX_LENGTH_WITHOUT_COUNTRY_CODE = 11
-
-                # Se o usuário digitou sem o 55 (ex: 31999999999 - tem 10 ou 11 digitos), adicionamos
-                # Se ele já digitou 5531..., mantemos.
-                if len(numbers) <= MAX_LENGTH_WITHOUT_COUNTRY_CODE:
-                    numbers = '55' + numbers
-
-                self.value = f"+{numbers}"
-
-            # Lógica para Telefone Exterior (+Pais...)
-            elif self.contact_type_id in PHONE_EXT:
-                # Apenas limpa caracteres não numéricos e garante o + no início
-                numbers = re.sub(r'[^0-9]', '', self.value)
-                self.value = f"+{numbers}"
-
+        self.normalize_fields()
         super().save(*args, **kwargs)
+
+    @staticmethod
+    def normalize_value(contact_type_id, value):
+        """
+        Valor do contato como é gravado (mesma regra do save(), usada também nas cargas em lote).
+        A regra vem do tipo de contato (registro em memória, sem consulta).
+        """
+        return normalize_contact_value(get_contact_types().kind(contact_type_id), value)
+
+    def normalize_fields(self):
+        """
+        Padroniza o valor como é gravado (chamado pelo save() e pelas gravações em lote).
+        Emails em minúsculas; telefones do Brasil como +55DDDNUMERO; do exterior como +DIGITOS.
+        """
+        self.value = self.normalize_value(self.contact_type_id, self.value)
@@ -0,0 +1,171 @@
+# apps/common/normalization.py
+
+"""
+Normalização de textos: chaves de busca e regras de gravação dos cadastros.
+
+É o único lugar com essas regras. Os save() dos models, as cargas em lote
+(bulk_create) e a busca das listagens chamam estas funções, então todos os
+caminhos gravam e comparam a mesma forma do texto.
+
+Desempenho (cada save() normaliza vários campos):
+- Expressões regulares compiladas uma única vez, na importação do módulo.
+- Remoção de acentos por tabela de str.translate (pré-calculada para os
+  caracteres latinos); o unicodedata só é usado para caracteres fora dela.
+- Cache LRU por valor: bairros, cidades, logradouros e nomes se repetem muito.
+- normalize_column aplica uma regra a uma coluna inteira de um lote.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+_NON_DIGITS = re.compile(r'[^0-9]+')
+_NON_ALNUM = re.compile(r'[^A-Z0-9]+')
+
+# Valores distintos guardados por regra (textos curtos: poucos MB no pior caso)
+CACHE_SIZE = 8192
+
+
+def _ascii_fold(char):
+    return unicodedata.normalize('NFKD', char).encode('ASCII', 'ignore').decode('utf-8')
+
+
+# Latin-1, Latin Extended A/B, diacríticos combinantes e pontuação geral (travessões, aspas, espaços)
+_FOLD_TABLE = {
+    code: _ascii_fold(chr(code))
+    for block in (range(0x80, 0x250), range(0x300, 0x370), range(0x2000, 0x2070))
+    for code in block
+}
+
+
+def fold_accents(text):
+    """
+    Remove acentos e caracteres não-ASCII (Ex: 'São João' -> 'Sao Joao').
+    Mesmo resultado do NFKD + descarte dos não-ASCII, pela tabela pré-calculada.
+    """
+    if text.isascii():
+        return text
+    folded = text.translate(_FOLD_TABLE)
+    if folded.isascii():
+        return folded
+    # Caracteres fora da tabela (ex: outros alfabetos): caminho completo
+    return _ascii_fold(text)
+
+
+def only_digits(value):
+    """
+    Mantém apenas os dígitos (Ex: '123.456.789-00' -> '12345678900').
+    """
+    if not value:
+        return ''
+    value = str(value)
+    if value.isdigit() and value.isascii():
+        return value
+    return _NON_DIGITS.sub('', value)
+
+
+def normalize_search_text(value):
+    """
+    Gera a chave de busca de um texto: sem acentos, em caixa alta, com
+    pontuação trocada por espaço e espaços repetidos colapsados.
+    Ex: '  José da Silva-Ltda. ' -> 'JOSE DA SILVA LTDA'
+    """
+    if not value:
+        return ''
+    return _search_key(str(value))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _search_key(text):
+    return _NON_ALNUM.sub(' ', fold_accents(text).upper()).strip()
+
+
+# --- Regras de gravação dos cadastros ---
+
+_RG_IE_SEPARATORS = re.compile(r'[\.\-\/]')
+
+# Telefone Brasil: DDD (2) + número (até 9) = 11 dígitos sem o código do país
+MAX_LENGTH_WITHOUT_COUNTRY_CODE = 11
+
+
+def clean_upper_text(value):
+    """
+    Texto sem acentos, sem espaços nas pontas e em caixa alta, ou None se vazio.
+    Ex: ' São João ' -> 'SAO JOAO'
+    """
+    if not value:
+        return None
+    return _upper_key(str(value))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _upper_key(text):
+    return fold_accents(text).strip().upper()
+
+
+def clean_rg_ie(value):
+    """
+    RG/IE sem pontos, traços e barras, em caixa alta, ou None se vazio.
+    """
+    if not value:
+        return None
+    return _RG_IE_SEPARATORS.sub('', str(value)).strip().upper()
+
+
+def format_phone_br(value):
+    """
+    Telefone brasileiro no formato +55DDDNUMERO (o 55 é acrescentado se faltar).
+    """
+    numbers = only_digits(value)
+    if len(numbers) <= MAX_LENGTH_WITHOUT_COUNTRY_CODE:
+        numbers = '55' + numbers
+    return f"+{numbers}"
+
+
+def format_phone_intl(value):
+    """
+    Telefone do exterior: apenas dígitos, com o + no início.
+    """
+    return f"+{only_digits(value)}"
+
+
+def normalize_email(value):
+    return value.lower()
+
+
+# Tipo de normalização de um contato -> regra aplicada ao valor (já sem espaços nas pontas)
+CONTACT_NORMALIZERS = {
+    'phone_br': format_phone_br,
+    'email': normalize_email,
+    'phone_intl': format_phone_intl,
+}
+
+
+def normalize_contact_value(kind, value):
+    """
+    Normaliza o valor de um contato conforme o tipo ('phone_br', 'email', 'phone_intl').
+    Tipos sem regra apenas perdem os espaços nas pontas.
+    """
+    if not value:
+        return value
+    value = str(value).strip()
+    normalizer = CONTACT_NORMALIZERS.get(kind)
+    return normalizer(value) if normalizer else value
+
+
+def normalize_column(values, normalizer):
+    """
+    Aplica uma regra a uma coluna inteira de um lote, calculando cada valor
+    distinto uma única vez (bairros, cidades e tipos se repetem muito).
+    """
+    seen = {}
+    result = []
+    for value in values:
+        try:
+            normalized = seen[value]
+        except KeyError:
+            normalized = seen[value] = normalizer(value)
+        except TypeError:  # valor não "hashable": calcula direto
+            normalized = normalizer(value)
+        result.append(normalized)
+    return result
@@ -0,0 +1,383 @@
+# apps/common/pagination.py
+
+"""
+Paginação das listagens do CommonListView.
+
+1. CountingPaginator: paginação numerada (OFFSET) com estratégia de contagem
+   configurável (exata, em cache ou estimada pelas estatísticas do banco).
+
+2. KeysetPaginator: paginação por cursor (keyset / seek). Em vez de OFFSET,
+   cada página é buscada a partir do último registro exibido:
+       WHERE (coluna, id) > (valor, id) ORDER BY coluna, id LIMIT n
+   Assim, a página 4000 custa o mesmo que a página 1 e nenhum COUNT(*) é executado.
+
+   Os cursores são tokens opacos (assinados com a SECRET_KEY) e ficam presos à
+   ordenação que os gerou: se o usuário trocar a ordenação, o cursor é descartado
+   e a listagem volta para o início.
+
+   Valores NULL na coluna de ordenação são tratados como "menores que tudo",
+   que é o comportamento nativo do MySQL e do SQLite.
+"""
+
+import hashlib
+import logging
+from functools import cached_property
+
+from django.core import signing
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connections
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+# Estratégias de contagem
+COUNT_EXACT = "exact"
+COUNT_CACHED = "cached"
+COUNT_ESTIMATED = "estimated"
+COUNT_STRATEGIES = (COUNT_EXACT, COUNT_CACHED, COUNT_ESTIMATED)
+
+# Abaixo disso a estimativa não compensa: o COUNT(*) exato já é barato
+ESTIMATE_MIN_ROWS = 10000
+
+CURSOR_SALT = "common.pagination.cursor"
+
+NEXT = "n"
+PREVIOUS = "p"
+LAST = "l"
+
+_PK_NAMES = ("pk", "id")
+_JSON_NATIVE = (str, int, float, bool, type(None))
+
+
+def count_cache_key(queryset):
+    """
+    Chave de cache da contagem, derivada do SQL filtrado (assinatura dos filtros).
+    A ordenação é descartada: não altera o total.
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.sha256(f"{sql}|{params!r}".encode()).hexdigest()
+    return f"common:count:{queryset.model._meta.label_lower}:{digest}"
+
+
+def estimate_table_rows(model, using="default"):
+    """
+    Retorna o número aproximado de linhas da tabela segundo as estatísticas
+    do planejador do banco, ou None se não houver estatística disponível.
+    - MySQL: information_schema.TABLES.TABLE_ROWS
+    - SQLite: sqlite_stat1 (preenchida pelo comando ANALYZE)
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+
+    if connection.vendor == "mysql":
+        sql = (
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"
+        )
+    elif connection.vendor == "sqlite":
+        sql = "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1"
+    else:
+        return None
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError as e:
+        # Ex: sqlite_stat1 só existe depois do primeiro ANALYZE
+        logger.debug(f"Estatística indisponível para {table}: {e}")
+        return None
+
+    if not row or row[0] is None:
+        return None
+    # No SQLite o campo 'stat' é uma string "linhas [média por índice...]"
+    return int(str(row[0]).split()[0])
+
+
+class CountingPaginator(Paginator):
+    """
+    Paginator com estratégia de contagem configurável.
+
+    Estratégias:
+    - 'exact': COUNT(*) a cada requisição (comportamento padrão do Django).
+    - 'cached': COUNT(*) guardado em cache por assinatura de filtros, durante count_timeout segundos.
+    - 'estimated': sem filtros, usa a estatística do banco (count_is_approximate=True);
+      com filtros, cai para 'cached'.
+
+    A estimativa serve apenas para exibir o total. A navegação continua exata:
+    cada página é buscada com LIMIT per_page + 1 e, se a estatística estiver
+    abaixo do real, o total é ampliado para que a página seguinte exista; ao
+    chegar ao fim (ou a uma página vazia por superestimativa) o total real é fixado.
+    """
+
+    def __init__(self, *args, count_strategy=COUNT_EXACT, count_timeout=60, **kwargs):
+        super().__init__(*args, **kwargs)
+        if count_strategy not in COUNT_STRATEGIES:
+            raise ValueError(f"Estratégia de contagem inválida: {count_strategy!r}. Use uma de: {COUNT_STRATEGIES}.")
+        self.count_strategy = count_strategy
+        self.count_timeout = count_timeout
+        self._count_is_approximate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if self.count_strategy == COUNT_EXACT or not hasattr(queryset, "query"):
+            return super().count
+
+        if self.count_strategy == COUNT_ESTIMATED and not queryset.query.has_filters():
+            estimate = estimate_table_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATE_MIN_ROWS:
+                self._count_is_approximate = True
+                return estimate
+
+        return self._cached_count()
+
+    def _cached_count(self):
+        key = count_cache_key(self.object_list)
+        total = cache.get(key)
+        if total is None:
+            total = self.object_list.count()
+            cache.set(key, total, self.count_timeout)
+        return total
+
+    def _set_count(self, total, approximate):
+        self.__dict__["count"] = total
+        self.__dict__.pop("num_pages", None)
+        self._count_is_approximate = approximate
+
+    @property
+    def count_is_approximate(self):
+        self.count  # noqa: B018 (garante que a contagem já foi resolvida)
+        return self._count_is_approximate
+
+    def page(self, number):
+        if not self.count_is_approximate:
+            return super().page(number)
+
+        # Total estimado: a página é validada pelos registros que ela realmente tem
+        number = self._validate_positive(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+
+        if not rows and number > 1:
+            # Estatística acima do real: fixa o total exato e deixa o Django recusar a página
+            self._set_count(self._cached_count(), approximate=False)
+            return super().page(number)
+
+        if len(rows) <= self.per_page:
+            # Última página: o total real é conhecido sem COUNT(*)
+            self._set_count(bottom + len(rows), approximate=False)
+        elif bottom + len(rows) > self.count:
+            # Estatística abaixo do real: amplia o total para alcançar a próxima página
+            self._set_count(bottom + len(rows), approximate=True)
+        return self._get_page(rows[:self.per_page], number, self)
+
+    def _validate_positive(self, number):
+        """
+        validate_number() sem o limite superior (num_pages vem da estimativa).
+        """
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"]) from None
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+
+def _get_value(obj, field):
+    """
+    Lê o valor de ordenação de uma linha.
+    Suporta instâncias de model, dicionários (values) e tuplas nomeadas (values_list).
+    """
+    if isinstance(obj, dict):
+        return obj[field]
+    if hasattr(obj, field):
+        return getattr(obj, field)
+    # Relações (ex: 'city__name') em instâncias de model
+    for part in field.split("__"):
+        obj = getattr(obj, part) if obj is not None else None
+    return obj
+
+
+def _to_json(value):
+    if isinstance(value, _JSON_NATIVE):
+        return value
+    # Datas, Decimals, UUIDs... viram string; o ORM converte de volta no filtro
+    return DjangoJSONEncoder().default(value)
+
+
+class KeysetPage:
+    """
+    Página de uma paginação por cursor.
+    Não possui número de página nem total: apenas vizinhos (anterior/próxima).
+    """
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f"<KeysetPage ({len(self.object_list)} registros)>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not (self._has_next and self.object_list):
+            return None
+        return self.paginator.encode_cursor(NEXT, self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not (self._has_previous and self.object_list):
+            return None
+        return self.paginator.encode_cursor(PREVIOUS, self.object_list[0])
+
+    @property
+    def last_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.encode_cursor(LAST)
+
+
+class KeysetPaginator:
+    """
+    Pagina um queryset pela coluna de ordenação ativa + id (desempate estável).
+
+    Parâmetros:
+    - queryset: Queryset já filtrado.
+    - per_page: Quantidade de registros por página.
+    - ordering: Ordenação ativa (ex: 'name' ou '-name'). Se vazia, usa a pk.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = ordering or "pk"
+        self.descending = self.ordering.startswith("-")
+        self.field = self.ordering.lstrip("-")
+
+        if self.field in _PK_NAMES:
+            self.order_fields = ("pk",)
+        else:
+            self.order_fields = (self.field, "pk")
+
+    # --- Cursores ---
+
+    def encode_cursor(self, direction, obj=None):
+        payload = {"o": self.ordering, "d": direction}
+        if obj is not None:
+            payload["k"] = _to_json(_get_value(obj, "pk"))
+            if self.field not in _PK_NAMES:
+                payload["v"] = _to_json(_get_value(obj, self.field))
+        return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, token):
+        """
+        Retorna o payload do cursor ou None se ele for inválido, adulterado
+        ou pertencer a outra ordenação.
+        """
+        if not token:
+            return None
+        try:
+            payload = signing.loads(token, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return None
+        if not isinstance(payload, dict) or payload.get("o") != self.ordering:
+            return None
+        if payload.get("d") not in (NEXT, PREVIOUS, LAST):
+            return None
+        if payload["d"] != LAST and "k" not in payload:
+            return None
+        return payload
+
+    # --- Construção das consultas ---
+
+    def _ordered(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = "-" if descending else ""
+        return self.queryset.order_by(*(f"{prefix}{f}" for f in self.order_fields))
+
+    def _greater(self, value, pk):
+        if self.field in _PK_NAMES:
+            return Q(pk__gt=pk)
+        f = self.field
+        if value is None:
+            return Q(**{f"{f}__isnull": False}) | Q(**{f"{f}__isnull": True, "pk__gt": pk})
+        return Q(**{f"{f}__gt": value}) | Q(**{f: value, "pk__gt": pk})
+
+    def _lesser(self, value, pk):
+        if self.field in _PK_NAMES:
+            return Q(pk__lt=pk)
+        f = self.field
+        if value is None:
+            return Q(**{f"{f}__isnull": True, "pk__lt": pk})
+        return (
+            Q(**{f"{f}__lt": value})
+            | Q(**{f"{f}__isnull": True})
+            | Q(**{f: value, "pk__lt": pk})
+        )
+
+    def _after(self, value, pk):
+        """Registros que vêm depois do cursor na ordem de exibição."""
+        return self._lesser(value, pk) if self.descending else self._greater(value, pk)
+
+    def _before(self, value, pk):
+        """Registros que vêm antes do cursor na ordem de exibição."""
+        return self._greater(value, pk) if self.descending else self._lesser(value, pk)
+
+    # --- API pública ---
+
+    def page(self, cursor=None):
+        """
+        Retorna a KeysetPage correspondente ao cursor (ou a primeira página).
+        Cada página custa uma única consulta com LIMIT per_page + 1.
+        """
+        payload = self.decode_cursor(cursor)
+        limit = self.per_page + 1
+
+        if payload is None:
+            rows = list(self._ordered()[:limit])
+            has_next, has_previous = len(rows) > self.per_page, False
+            rows = rows[:self.per_page]
+
+        elif payload["d"] == NEXT:
+            condition = self._after(payload.get("v"), payload["k"])
+            rows = list(self._ordered().filter(condition)[:limit])
+            has_next, has_previous = len(rows) > self.per_page, True
+            rows = rows[:self.per_page]
+
+        else:
+            # PREVIOUS e LAST percorrem a ordem invertida e desinvertem o resultado
+            queryset = self._ordered(reverse=True)
+            if payload["d"] == PREVIOUS:
+                queryset = queryset.filter(self._before(payload.get("v"), payload["k"]))
+            rows = list(queryset[:limit])
+            has_next, has_previous = payload["d"] == PREVIOUS, len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+
+        return KeysetPage(rows, self, has_next=has_next, has_previous=has_previous)
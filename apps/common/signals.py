@@ -0,0 +1,33 @@
+# apps/common/signals.py
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .conditional import has_change_tracking, record_deletion
+from .contact_types import invalidate_contact_types
+from .models import AuxContactType
+
+
+@receiver([post_save, post_delete], sender=AuxContactType)
+def invalidate_contact_type_registry(sender, using=None, **kwargs):
+    """
+    Qualquer alteração nos tipos de contato invalida o registro em memória
+    (regras de padronização e opções dos formulários). Só após o commit: antes
+    dele, outro processo remontaria o registro com os dados antigos e o manteria.
+    """
+    transaction.on_commit(invalidate_contact_types, using=using)
+
+
+def count_deletion(sender, using=None, **kwargs):
+    """
+    Exclusões não alteram o MAX(updated_at): entram na versão das listagens por um contador.
+    """
+    transaction.on_commit(lambda: record_deletion(sender), using=using)
+
+
+# Apenas os models com controle de versão: os demais mantêm a exclusão rápida (sem signals)
+for _model in apps.get_models():
+    if has_change_tracking(_model):
+        post_delete.connect(count_deletion, sender=_model, dispatch_uid=f"count_deletion:{_model._meta.label_lower}")
@@ -0,0 +1,113 @@
+# apps/common/tables.py
+
+"""
+Renderização rápida do corpo das tabelas de listagem.
+
+Caminho padrão: instância completa do model -> get_row_data(item) (reverse e
+format_html por linha) -> laço por célula no template.
+
+Caminho rápido (CommonListView.fast_rows = True):
+1. As linhas vêm do banco como tuplas (values_list), sem instanciar models.
+2. A URL de detalhe é montada a partir de um molde calculado uma única vez
+   (prefixo + pk + sufixo), sem reverse() por linha.
+3. Um RowFormatter "compilado" a partir do table_headers transforma cada tupla
+   em '<tr>...</tr>' com uma única chamada de str.format, e o corpo inteiro
+   chega pronto ao template (table_body).
+
+Chaves opcionais de cada coluna do table_headers usadas pelo formatter:
+- 'link': True -> a célula vira link para a página de detalhe do registro.
+- 'display': dicionário valor -> rótulo (ex: {True: 'Sim', False: 'Não'}).
+"""
+
+from html import escape, unescape
+from operator import itemgetter
+
+from django.urls import reverse
+from django.utils.formats import localize
+from django.utils.html import conditional_escape, strip_tags
+from django.utils.safestring import mark_safe
+
+# Valor fictício usado para descobrir onde a pk entra na URL
+_PK_PLACEHOLDER = 2147483647
+
+
+def compile_url_template(url_name):
+    """
+    Resolve a URL de detalhe uma única vez e retorna uma função pk -> URL.
+    """
+    prefix, suffix = reverse(url_name, args=[_PK_PLACEHOLDER]).split(str(_PK_PLACEHOLDER), 1)
+    return lambda pk: f"{prefix}{pk}{suffix}"
+
+
+def render_cells(cells):
+    """
+    HTML de uma linha a partir das células de get_row_data (mesmo resultado do laço do table.html).
+    """
+    return "<tr>" + "".join(f"<td>{_text(cell)}</td>" for cell in cells) + "</tr>"
+
+
+def plain_cells(cells):
+    """
+    Células de get_row_data sem HTML (ex: links), com os mesmos valores exibidos (usado pela exportação).
+    """
+    return [unescape(strip_tags(cell)) if isinstance(cell, str) else cell for cell in cells]
+
+
+def _text(value):
+    """
+    Célula como o table.html a exibe: localizada (datas, números) e escapada; None fica vazio.
+    """
+    return "" if value is None else conditional_escape(localize(value))
+
+
+class RowFormatter:
+    """
+    Formatter de linhas montado uma vez por requisição a partir do table_headers.
+
+    Parâmetros:
+    - headers: table_headers da view.
+    - fields: ordem das colunas na tupla do values_list (deve conter 'pk').
+    - url_for: função pk -> URL de detalhe (compile_url_template), opcional.
+    """
+
+    def __init__(self, headers, fields, url_for=None):
+        position = {field: i for i, field in enumerate(fields)}
+        get_pk = itemgetter(position["pk"])
+
+        cells, values = [], []
+        for header in headers:
+            get_value = self._compile_value(itemgetter(position[header["field"]]), header.get("display"))
+            link = header.get("link") and url_for is not None
+            values.append(get_value)
+            cells.append(self._compile_cell(get_value, get_pk, url_for if link else None))
+
+        self._cells = cells
+        self._values = values
+        self._template = "<tr>" + "<td>{}</td>" * len(cells) + "</tr>"
+
+    @staticmethod
+    def _compile_value(get_value, display):
+        if display:
+            return lambda row: display.get(get_value(row), get_value(row))
+        return get_value
+
+    @staticmethod
+    def _compile_cell(get_value, get_pk, url_for):
+        if url_for:
+            return lambda row: f'<a href="{escape(url_for(get_pk(row)))}">{_text(get_value(row))}</a>'
+        return lambda row: _text(get_value(row))
+
+    def values(self, row):
+        """
+        Valores exibidos em cada célula, sem HTML (usado pela exportação).
+        """
+        return [get_value(row) for get_value in self._values]
+
+    def format_row(self, row):
+        return self._template.format(*[cell(row) for cell in self._cells])
+
+    def render(self, rows):
+        """
+        Retorna o HTML de todas as linhas (marcado como seguro: os valores já foram escapados).
+        """
+        return mark_safe("".join(map(self.format_row, rows)))  # noqa: S308
@@ -2,11 +2,17 @@
 
 from django.urls import path
 
-from .views import api_busca_cep
+from .views import api_busca_cep, api_busca_cep_async, api_busca_ceps, api_cache_stats
 
 app_name = 'common'
 
 urlpatterns = [
     # Exemplo de URL: /common/api/cep/30000000/
     path('api/cep/<str:cep>/', api_busca_cep, name='api-busca-cep'),
+    # Resolução em lote (POST JSON {"ceps": [...]}): /common/api/ceps/
+    path('api/ceps/', api_busca_ceps, name='api-busca-ceps'),
+    # Variante assíncrona (ASGI): /common/api/cep-async/30000000/
+    path('api/cep-async/<str:cep>/', api_busca_cep_async, name='api-busca-cep-async'),
+    # Acertos/erros do cache de fragmentos das listagens (apenas equipe)
+    path('api/cache-stats/', api_cache_stats, name='api-cache-stats'),
 ]
@@ -1,69 +1,463 @@
 # apps/common/utils.py
 
 import logging
-from http import HTTPStatus
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
+from asgiref.sync import sync_to_async
 from cities.models import City
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .cep_client import ERRO_DESCONHECIDO, CepServiceError, brasilapi
+from .cep_index import CEP_LENGTH, cidade_id_por_cep
+from .models import CepCache
+from .normalization import only_digits
 
 logger = logging.getLogger(__name__)
 
-def buscar_dados_cep(cep):
+# Validade do cache de CEP (segundos). CEPs inexistentes expiram antes,
+# pois podem passar a existir (loteamentos novos).
+CEP_CACHE_TTL = getattr(settings, 'CEP_CACHE_TTL', 60 * 60 * 24 * 30)
+CEP_CACHE_NOT_FOUND_TTL = getattr(settings, 'CEP_CACHE_NOT_FOUND_TTL', 60 * 60 * 24)
+
+# Depois de vencido, o registro ainda é servido na hora durante CEP_CACHE_STALE_TTL
+# segundos, enquanto é atualizado em segundo plano (stale-while-revalidate).
+# Passada essa janela, a BrasilAPI é consultada durante a requisição.
+CEP_CACHE_STALE_TTL = getattr(settings, 'CEP_CACHE_STALE_TTL', 60 * 60 * 24 * 7)
+
+# Atualizações em segundo plano simultâneas (uma por CEP)
+CEP_REVALIDATE_WORKERS = 2
+
+# Consultas simultâneas à BrasilAPI na resolução em lote (não exceder o pool do cliente)
+CEP_BATCH_WORKERS = getattr(settings, 'CEP_BATCH_WORKERS', 8)
+
+ERRO_CEP_INVALIDO = {"erro": "CEP inválido."}
+ERRO_CEP_NAO_ENCONTRADO = {"erro": "CEP não encontrado."}
+
+
+def limpar_cep(cep):
+    """
+    Remove a máscara do CEP (Ex: '30.130-010' -> '30130010').
+    """
+    return only_digits(cep)
+
+
+def _codigo_ibge(data, cep=None):
+    """
+    Código IBGE da cidade: pelo índice offline de faixas de CEP ou pela resposta da API.
+    """
+    ibge_code = cidade_id_por_cep(cep) if cep else None
+    ibge_code = ibge_code or data.get("ibge")
+    try:
+        return int(ibge_code) if ibge_code else None
+    except (TypeError, ValueError):
+        return None
+
+
+class CidadesEmLote:
+    """
+    Resolve as cidades de vários CEPs com UMA única consulta ao banco
+    (códigos IBGE + pares Nome/UF de quem não tem código).
+    """
+
+    def __init__(self, itens):
+        ids = set()
+        nomes = set()
+        for data, cep in itens:
+            ibge_code = _codigo_ibge(data, cep)
+            if ibge_code:
+                ids.add(ibge_code)
+            elif data.get("city") and data.get("state"):
+                nomes.add((data["city"].upper(), data["state"].upper()))
+
+        cidades = []
+        if ids or nomes:
+            condition = Q(pk__in=ids)
+            for nome, uf in nomes:
+                condition |= Q(name__iexact=nome, uf__abbreviation__iexact=uf)
+            cidades = City.objects.select_related('uf').filter(condition)
+
+        self.por_id = {}
+        self.por_nome = {}
+        for city in cidades:
+            self.por_id[city.pk] = city
+            self.por_nome[(city.name.upper(), city.uf.abbreviation.upper())] = city
+
+    def resolver(self, data, cep=None):
+        ibge_code = _codigo_ibge(data, cep)
+        city_obj = self.por_id.get(ibge_code) if ibge_code else None
+        if not city_obj and data.get("city") and data.get("state"):
+            city_obj = self.por_nome.get((data["city"].upper(), data["state"].upper()))
+        return city_obj
+
+
+def _resolver_cidade(data, cep=None, cidades=None):
     """
-    Busca dados do CEP na BrasilAPI.
     Estratégia de Busca Local:
-    1. Tenta pelo código IBGE (Mais preciso).
+    1. Tenta pelo índice offline de faixas de CEP ou pelo código IBGE da API (Mais preciso).
     2. Se falhar, tenta pelo Nome da Cidade + Sigla do Estado (Fallback).
+    Com 'cidades' (CidadesEmLote), a resolução é feita no mapa já carregado.
+    """
+    if cidades is not None:
+        return cidades.resolver(data, cep)
+
+    ibge_code = _codigo_ibge(data, cep)
+    cidade_nome_api = data.get("city")
+    uf_api = data.get("state")
+
+    city_obj = None
+
+    # TENTATIVA 1: Busca pelo ID (IBGE)
+    if ibge_code:
+        city_obj = City.objects.select_related('uf').filter(pk=ibge_code).first()
+
+    # TENTATIVA 2: Busca por Nome + UF (Caso a API não retorne IBGE)
+    if not city_obj and cidade_nome_api and uf_api:
+        city_obj = City.objects.select_related('uf').filter(
+            name__iexact=cidade_nome_api,
+            uf__abbreviation__iexact=uf_api
+        ).first()
+
+    return city_obj
+
+
+def _montar_resultado(data, cep=None, cidades=None):
+    """
+    Converte a resposta da BrasilAPI no formato esperado pelo front-end.
+    """
+    city_obj = _resolver_cidade(data, cep, cidades)
+
+    return {
+        "cep": data.get("cep") or cep,
+        "logradouro": data.get("street"),
+        "complemento": data.get("complement", ""),
+        "bairro": data.get("neighborhood"),
+        "cidade_id": city_obj.pk if city_obj else None,
+        "cidade_nome": str(city_obj) if city_obj else data.get("city"),
+        "uf": data.get("state") or (city_obj.uf.abbreviation if city_obj else None),
+        "encontrou_cidade_local": city_obj is not None
+    }
+
+
+def _ttl_cep(status):
+    return CEP_CACHE_TTL if status == CepCache.STATUS_FOUND else CEP_CACHE_NOT_FOUND_TTL
+
+
+def _chave_cache_cep(cep):
+    return f"common:cep:{cep}"
+
+
+def _resultado_do_registro(registro, cidades=None):
+    if registro.status == CepCache.STATUS_NOT_FOUND:
+        return ERRO_CEP_NAO_ENCONTRADO
+    return _montar_resultado(registro.payload, registro.cep, cidades)
+
+
+def _resultado_offline(cep, cidades=None):
+    """
+    Resultado parcial (apenas a cidade) pelo índice offline de faixas de CEP.
+    Usado quando a BrasilAPI está indisponível e não há nada em cache.
+    """
+    if not cidade_id_por_cep(cep):
+        return None
+    resultado = _montar_resultado({}, cep, cidades)
+    if not resultado["encontrou_cidade_local"]:
+        return None
+    resultado["parcial"] = True
+    return resultado
+
+
+def _guardar_em_memoria(registro, resultado):
+    """
+    Guarda o resultado pronto no cache do Django pelo tempo de validade restante.
+    """
+    restante = _ttl_cep(registro.status) - (timezone.now() - registro.fetched_at).total_seconds()
+    if restante > 0:
+        cache.set(_chave_cache_cep(registro.cep), resultado, int(restante))
+
+
+def _idade(registro, agora=None):
+    """
+    Segundos desde o vencimento do registro (negativo enquanto ainda é válido).
     """
-    cep_limpo = str(cep).replace("-", "").replace(".", "").strip()
-    url = f"https://brasilapi.com.br/api/cep/v2/{cep_limpo}"
+    return ((agora or timezone.now()) - registro.fetched_at).total_seconds() - _ttl_cep(registro.status)
+
+
+_revalidacao = ThreadPoolExecutor(max_workers=CEP_REVALIDATE_WORKERS, thread_name_prefix='cep-revalidate')
+_revalidando = set()
+_revalidando_lock = threading.Lock()
 
+
+def _revalidar(cep):
     try:
-        response = requests.get(url, timeout=5)
+        status, payload = brasilapi.fetch(cep)
+        _registrar_resposta(cep, status, payload)
+    except CepServiceError as e:
+        # O registro vencido continua sendo servido; a próxima consulta tenta de novo
+        logger.warning(f"Falha ao atualizar o CEP {cep} em segundo plano: {e}")
+    except Exception:
+        logger.exception(f"Erro ao atualizar o CEP {cep} em segundo plano")
+    finally:
+        with _revalidando_lock:
+            _revalidando.discard(cep)
+        # Conexões abertas por esta thread não são fechadas pelo ciclo de requisição
+        connections.close_all()
 
-        if response.status_code == HTTPStatus.OK:
-            data = response.json()
 
-            ibge_code = data.get("ibge")
-            cidade_nome_api = data.get("city")
-            uf_api = data.get("state")
+def agendar_revalidacao(cep):
+    """
+    Atualiza o CEP pela BrasilAPI em segundo plano (no máximo uma atualização por CEP).
+    """
+    with _revalidando_lock:
+        if cep in _revalidando:
+            return
+        _revalidando.add(cep)
+    _revalidacao.submit(_revalidar, cep)
 
-            city_obj = None
 
-            # TENTATIVA 1: Busca pelo ID (IBGE)
-            if ibge_code:
-                city_obj = City.objects.filter(pk=ibge_code).first()
-
-            # TENTATIVA 2: Busca por Nome + UF (Caso a API não retorne IBGE)
-            if not city_obj and cidade_nome_api and uf_api:
-                try:
-                    # Tenta filtrar por nome exato e sigla do estado
-                    # Assumindo que seu model City tem relacionamento com UF via 'uf__sigla'
-                    city_obj = City.objects.filter(
-                        name__iexact=cidade_nome_api,
-                        uf__sigla__iexact=uf_api
-                    ).first()
-                except Exception:
-                    # Se der erro no filtro do estado (ex: campo tem outro nome),
-                    # tenta apenas pelo nome da cidade como último recurso
-                    city_obj = City.objects.filter(name__iexact=cidade_nome_api).first()
-
-            return {
-                "cep": data.get("cep"),
-                "logradouro": data.get("street"),
-                "complemento": data.get("complement", ""),
-                "bairro": data.get("neighborhood"),
-                "cidade_id": city_obj.pk if city_obj else None,
-                "cidade_nome": str(city_obj) if city_obj else cidade_nome_api,
-                "uf": uf_api,
-                "encontrou_cidade_local": city_obj is not None
-            }
-
-        elif response.status_code == HTTPStatus.NOT_FOUND:
-            return {"erro": "CEP não encontrado."}
-
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Erro de conexão na busca de CEP: {e}")
-        return {"erro": "Serviço de CEP indisponível no momento."}
-
-    return {"erro": "Erro desconhecido ao buscar CEP."}
+def _consultar_cache(cep):
+    """
+    Procura o CEP nas camadas de cache.
+    Retorna (resultado, registro): 'resultado' é None quando a BrasilAPI precisa
+    ser consultada; 'registro' é a linha vencida da tabela (se houver).
+    Registro vencido há menos de CEP_CACHE_STALE_TTL é servido na hora e
+    atualizado em segundo plano.
+    """
+    resultado = cache.get(_chave_cache_cep(cep))
+    if resultado is not None:
+        return resultado, None
+
+    registro = CepCache.objects.filter(pk=cep).first()
+    if registro is None:
+        return None, None
+    idade = _idade(registro)
+    if idade > CEP_CACHE_STALE_TTL:
+        return None, registro
+    if idade > 0:
+        agendar_revalidacao(cep)
+        return _resultado_do_registro(registro), registro
+
+    resultado = _resultado_do_registro(registro)
+    _guardar_em_memoria(registro, resultado)
+    return resultado, registro
+
+
+def _registrar_resposta(cep, status, payload):
+    """
+    Persiste a resposta da BrasilAPI e devolve o resultado pronto.
+    """
+    registro, _ = CepCache.objects.update_or_create(
+        cep=cep,
+        defaults={'status': status, 'payload': payload, 'fetched_at': timezone.now()},
+    )
+    resultado = _resultado_do_registro(registro)
+    _guardar_em_memoria(registro, resultado)
+    return resultado
+
+
+def _resultado_em_falha(cep, registro, erro):
+    """
+    BrasilAPI indisponível: serve o registro vencido, mesmo fora da janela de
+    CEP_CACHE_STALE_TTL (stale-if-error) ou, sem registro, ao menos a cidade pelo índice offline.
+    """
+    if registro is None:
+        return _resultado_offline(cep) or erro.resultado
+    logger.warning(f"BrasilAPI indisponível, servindo cache vencido do CEP {cep}")
+    return _resultado_do_registro(registro)
+
+
+def buscar_dados_cep(cep):
+    """
+    Busca dados do CEP, consultando a BrasilAPI apenas quando necessário.
+
+    Camadas de cache:
+    1. Cache do Django (memória): resultado pronto, sem consultas ao banco.
+    2. Tabela cep_cache: resposta da API persistida, válida por CEP_CACHE_TTL
+       (ou CEP_CACHE_NOT_FOUND_TTL para CEPs inexistentes). Vencida há menos de
+       CEP_CACHE_STALE_TTL, é servida na hora e atualizada em segundo plano.
+    3. BrasilAPI: consultada durante a requisição quando o CEP é novo ou o
+       registro venceu além dessa janela.
+       Se a API falhar, o registro vencido continua sendo servido; sem registro,
+       a cidade ainda é resolvida pelo índice offline de faixas (resultado parcial).
+
+    A cidade é resolvida preferencialmente pelo índice offline de faixas de CEP;
+    a BrasilAPI fica responsável apenas pelos dados de rua.
+    """
+    cep_limpo = limpar_cep(cep)
+    if len(cep_limpo) != CEP_LENGTH:
+        return ERRO_CEP_INVALIDO
+
+    resultado, registro = _consultar_cache(cep_limpo)
+    if resultado is not None:
+        return resultado
+
+    try:
+        status, payload = brasilapi.fetch(cep_limpo)
+    except CepServiceError as e:
+        return _resultado_em_falha(cep_limpo, registro, e)
+
+    return _registrar_resposta(cep_limpo, status, payload)
+
+
+async def abuscar_dados_cep(cep):
+    """
+    Versão assíncrona de buscar_dados_cep (mesmas camadas de cache).
+    A chamada à BrasilAPI não prende o event loop e é compartilhada entre
+    requisições simultâneas do mesmo CEP.
+    """
+    cep_limpo = limpar_cep(cep)
+    if len(cep_limpo) != CEP_LENGTH:
+        return ERRO_CEP_INVALIDO
+
+    resultado, registro = await sync_to_async(_consultar_cache)(cep_limpo)
+    if resultado is not None:
+        return resultado
+
+    try:
+        status, payload = await brasilapi.afetch(cep_limpo)
+    except CepServiceError as e:
+        return await sync_to_async(_resultado_em_falha)(cep_limpo, registro, e)
+
+    return await sync_to_async(_registrar_resposta)(cep_limpo, status, payload)
+
+
+def _separar_ceps(ceps):
+    """
+    Limpa e remove duplicados. Retorna ({cep: None ou erro}, [ceps válidos, na ordem]).
+    """
+    resultados = {}
+    pendentes = []
+    for cep in ceps:
+        cep_limpo = limpar_cep(cep)
+        if len(cep_limpo) != CEP_LENGTH:
+            resultados[str(cep)] = ERRO_CEP_INVALIDO
+        elif cep_limpo not in resultados:
+            resultados[cep_limpo] = None
+            pendentes.append(cep_limpo)
+    return resultados, pendentes
+
+
+def _ler_memoria(pendentes, resultados):
+    """
+    Preenche os resultados guardados no cache de memória (um único get_many)
+    e devolve os CEPs que continuam pendentes.
+    """
+    em_memoria = cache.get_many([_chave_cache_cep(cep) for cep in pendentes])
+    for cep in pendentes:
+        resultado = em_memoria.get(_chave_cache_cep(cep))
+        if resultado is not None:
+            resultados[cep] = resultado
+    return [cep for cep in pendentes if resultados[cep] is None]
+
+
+def _ler_registros(pendentes, agora):
+    """
+    Lê os registros da tabela cep_cache com uma consulta. Retorna (todos, utilizáveis):
+    vencidos dentro da janela CEP_CACHE_STALE_TTL são utilizáveis e atualizados em segundo plano.
+    """
+    registros = CepCache.objects.in_bulk(pendentes)
+    validos = {}
+    for cep, registro in registros.items():
+        idade = _idade(registro, agora)
+        if idade <= CEP_CACHE_STALE_TTL:
+            validos[cep] = registro
+            if idade > 0:
+                agendar_revalidacao(cep)
+    return registros, validos
+
+
+def _consultar_um(cep):
+    try:
+        return cep, brasilapi.fetch(cep), None
+    except CepServiceError as e:
+        return cep, None, e
+    except Exception:
+        # Uma resposta inesperada não derruba o lote: vira erro só deste CEP
+        logger.exception(f"Erro inesperado ao consultar o CEP {cep}")
+        return cep, None, CepServiceError(ERRO_DESCONHECIDO)
+
+
+def _consultar_api(ceps, max_workers):
+    """
+    Consulta os CEPs na BrasilAPI com paralelismo limitado. Retorna (respostas, falhas).
+    """
+    respostas, falhas = {}, {}
+    if not ceps:
+        return respostas, falhas
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(ceps)))) as pool:
+        for cep, resposta, erro in pool.map(_consultar_um, ceps):
+            if erro is None:
+                respostas[cep] = resposta
+            else:
+                falhas[cep] = erro
+    return respostas, falhas
+
+
+def _persistir_respostas(respostas, registros, agora):
+    """
+    Grava as respostas da API em lote (um bulk_create e um bulk_update) e devolve os registros.
+    """
+    novos, atualizados, gravados = [], [], {}
+    for cep, (status, payload) in respostas.items():
+        registro = registros.get(cep) or CepCache(cep=cep)
+        registro.status, registro.payload, registro.fetched_at = status, payload, agora
+        (atualizados if cep in registros else novos).append(registro)
+        gravados[cep] = registro
+    if novos:
+        CepCache.objects.bulk_create(novos, ignore_conflicts=True)
+    if atualizados:
+        CepCache.objects.bulk_update(atualizados, ['status', 'payload', 'fetched_at'])
+    return gravados
+
+
+def _montar_resultados(resultados, validos, vencidos, falhas, agora):
+    """
+    Resolve as cidades de todos os CEPs com uma única consulta e monta os resultados.
+    Falhas: registro vencido (stale-if-error) ou apenas a cidade pelo índice offline.
+    """
+    itens = [(r.payload or {}, cep) for cep, r in (validos | vencidos).items()]
+    itens += [({}, cep) for cep in falhas if cep not in vencidos]
+    cidades = CidadesEmLote(itens)
+
+    para_memoria = {}
+    for cep, registro in validos.items():
+        resultados[cep] = _resultado_do_registro(registro, cidades)
+        restante = _ttl_cep(registro.status) - (agora - registro.fetched_at).total_seconds()
+        if restante > 0:
+            para_memoria[_chave_cache_cep(cep)] = (resultados[cep], int(restante))
+    for cep, erro in falhas.items():
+        if cep in vencidos:
+            resultados[cep] = _resultado_do_registro(vencidos[cep], cidades)
+        else:
+            resultados[cep] = _resultado_offline(cep, cidades) or erro.resultado
+
+    for chave, (resultado, restante) in para_memoria.items():
+        cache.set(chave, resultado, restante)
+
+
+def buscar_dados_ceps(ceps, max_workers=CEP_BATCH_WORKERS):
+    """
+    Resolve vários CEPs de uma vez. Retorna {cep_limpo: resultado}
+    (CEPs inválidos aparecem com a chave original e o erro correspondente).
+
+    1. Remove duplicados e lê o cache de memória com um único get_many.
+    2. Lê os registros da tabela cep_cache com uma única consulta.
+    3. Consulta na BrasilAPI apenas os ausentes/vencidos além da janela, em paralelo (max_workers).
+       A falha de um CEP vira o erro daquele CEP, sem interromper o lote.
+    4. Persiste as respostas em lote e resolve todas as cidades com uma única consulta.
+    """
+    resultados, pendentes = _separar_ceps(ceps)
+    pendentes = _ler_memoria(pendentes, resultados)
+
+    agora = timezone.now()
+    registros, validos = _ler_registros(pendentes, agora)
+    respostas, falhas = _consultar_api([cep for cep in pendentes if cep not in validos], max_workers)
+    validos |= _persistir_respostas(respostas, registros, agora)
+
+    vencidos = {cep: registros[cep] for cep in falhas if cep in registros}
+    _montar_resultados(resultados, validos, vencidos, falhas, agora)
+    return resultados
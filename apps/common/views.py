@@ -1,11 +1,24 @@
 # apps/common/views.py
 
+import json
+import time
 from http import HTTPStatus
+from operator import attrgetter
 
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import JsonResponse
+from django.core.cache import cache
+from django.db.models import CharField, Q
+from django.db.models.functions import Cast
+from django.http import Http404, JsonResponse
+from django.shortcuts import redirect
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
+from django.utils.cache import patch_vary_headers
+from django.utils.safestring import mark_safe
 from django.views.decorators.http import require_http_methods
 from django.views.generic import (
     CreateView,
@@ -16,7 +29,61 @@ from django.views.generic import (
     UpdateView,
 )
 
-from .utils import buscar_dados_cep
+from .conditional import (
+    VERSION_FIELD,
+    can_use_conditional,
+    has_change_tracking,
+    make_etag,
+    not_modified_response,
+    set_conditional_headers,
+    table_version,
+)
+from .export import EXPORT_FORMATS, export_response, iter_export_rows
+from .fragments import cached_fragment, cached_page, signature
+from .fragments import stats as fragment_stats
+from .normalization import normalize_search_text, only_digits
+from .pagination import COUNT_EXACT, CountingPaginator, KeysetPaginator
+from .tables import RowFormatter, compile_url_template, plain_cells, render_cells
+from .utils import abuscar_dados_cep, buscar_dados_cep, buscar_dados_ceps
+
+# Limite de CEPs por requisição no endpoint em lote
+MAX_CEPS_POR_LOTE = 500
+# Cota de CEPs por usuário a cada CEP_LOTE_JANELA segundos no endpoint em lote
+# (cada CEP fora do cache pode gerar uma chamada à BrasilAPI)
+CEP_LOTE_COTA = getattr(settings, 'CEP_BATCH_RATE_LIMIT', 1000)
+CEP_LOTE_JANELA = 60
+
+# Política padrão de tamanho de página (sobrescrita por LIST_PAGE_SIZE_OPTIONS / LIST_MAX_PAGE_SIZE)
+DEFAULT_PAGE_SIZE_OPTIONS = [20, 50, 100, 500]
+DEFAULT_MAX_PAGE_SIZE = 500
+
+# Versão da linha para o cache de fragmentos: updated_at lido como texto, direto na chave
+# (sem a conversão para datetime de cada linha, que custaria mais que a própria formatação)
+ROW_VERSION = 'row_version'
+
+# Normalizações aplicadas ao termo buscado (chave 'normalize' do search_config)
+SEARCH_NORMALIZERS = {
+    'text': normalize_search_text,
+    'digits': only_digits,
+}
+
+
+def _word_prefix(column, value):
+    """
+    Início de qualquer palavra da coluna normalizada (Ex: 'SILVA' e 'DA SIL'
+    encontram 'JOSE DA SILVA'). As palavras da chave são separadas por um único espaço.
+    """
+    return Q(**{f"{column}__startswith": value}) | Q(**{f"{column}__contains": f" {value}"})
+
+
+# Lookups de busca textual (chave 'lookup' do search_config)
+# Colunas normalizadas já estão em caixa alta, assim como o termo: comparação exata de caixa.
+# 'prefix' usa o índice da coluna; 'words' mantém a busca por trechos do nome (nome, sobrenome...)
+SEARCH_LOOKUPS = {
+    'icontains': lambda column, value: Q(**{f"{column}__icontains": value}),
+    'prefix': lambda column, value: Q(**{f"{column}__startswith": value}),
+    'words': _word_prefix,
+}
 
 
 class CommonListView(LoginRequiredMixin, ListView):
@@ -29,22 +96,294 @@ class CommonListView(LoginRequiredMixin, ListView):
     title = ""
     header_buttons = []
 
+    # Tamanhos de página aceitos em ?records_per_page= (None: padrões do settings).
+    # Valores fora da lista caem para a maior opção permitida abaixo deles; acima
+    # do teto (max_paginate_by), a requisição é redirecionada para a exportação.
+    page_size_param = 'records_per_page'
+    page_size_options = None
+    max_paginate_by = None
+
+    # 'offset': paginação numerada padrão do Django (?page=N, executa COUNT(*))
+    # 'keyset': paginação por cursor (?cursor=...), custo constante em qualquer página
+    pagination_mode = 'offset'
+    cursor_param = 'cursor'
+
+    # Contagem de registros da paginação 'offset': 'exact', 'cached' ou 'estimated'
+    paginator_class = CountingPaginator
+    count_strategy = COUNT_EXACT
+    count_cache_timeout = 60
+
+    # Plano de consulta da listagem (aplicado automaticamente no get_queryset)
+    # - list_select_related: relações trazidas no mesmo JOIN (ex: ['city__uf'])
+    # - list_only_fields: colunas carregadas, em geral as do table_headers (ex: ['id', 'name', 'city__name']).
+    #   Colunas de relações ('city__name') já entram no select_related. None carrega todas.
+    # - list_annotations: colunas calculadas (ex: {'total_addresses': Count('addresses')})
+    list_select_related = []
+    list_only_fields = None
+    list_annotations = {}
+
+    # Caminho rápido de renderização (ver common/tables.py): linhas lidas com values_list
+    # e corpo da tabela montado pelo RowFormatter a partir do table_headers, sem get_row_data.
+    # Colunas lidas: list_only_fields ou, na falta dele, os campos do table_headers.
+    fast_rows = False
+    detail_url_name = None  # Ex: 'clients:detail' (usada pelas colunas com 'link': True)
+
+    # Cache de fragmentos HTML (ver common/fragments.py)
+    # - row_cache: linhas guardadas por (pk, updated_at); só as alteradas são renderizadas, e uma
+    #   página sem alterações sai inteira de uma leitura do cache. O ganho é maior no caminho padrão
+    #   (get_row_data + template); no rápido, a leitura da página empata com a formatação. Ligue apenas
+    #   se o HTML da linha depender só da própria linha: colunas de relações mudam sem alterar a versão dela.
+    # - search_fields_cache: HTML dos campos de busca por versão das opções + valores preenchidos.
+    row_cache = False
+    search_fields_cache = True
+
+    # Exportação em streaming da listagem filtrada (?export=csv ou ?export=xlsx)
+    export_param = 'export'
+    export_formats = ('csv', 'xlsx')
+    export_filename = None  # Padrão: nome do model no plural
+
+    # GET condicional (ETag/Last-Modified) no partial AJAX: lista inalterada responde 304
+    # sem executar a consulta das linhas (ver common/conditional.py)
+    conditional_get = True
+
     # Configurações que as views filhas definem
+    # Busca textual: opcionalmente 'search_field' (coluna consultada), 'normalize' e 'lookup'
+    # Ex: {'name': 'name', 'type': 'text', 'search_field': 'search_name', 'normalize': 'text', 'lookup': 'words'}
     search_config = [] # [{'name': 'q', 'type': 'text', 'label': 'Buscar'}]
     table_headers = [] # [{'field': 'name', 'label': 'Nome'}]
 
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get(self.export_param)
+        if export_format:
+            return self.render_export(export_format)
+
+        # Página grande demais: em vez de materializar tudo, entrega a exportação em streaming.
+        # (AJAX não segue para um download: nesse caso o tamanho é apenas limitado ao teto)
+        requested = self.get_requested_page_size()
+        is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+        if requested and requested > self.get_max_paginate_by() and self.export_formats and not is_ajax:
+            return redirect(self.get_export_url(self.export_formats[0]))
+
+        if not (is_ajax and self.conditional_get and has_change_tracking(self.model) and can_use_conditional(request)):
+            return super().get(request, *args, **kwargs)
+
+        # Versão da tabela (MAX indexado + exclusões): se o navegador já a tem, 304.
+        # Os filtros e a página fazem parte do ETag pela URL completa.
+        last_modified, deletions = table_version(self.model)
+        etag = make_etag(request, deletions, last_modified)
+        response = not_modified_response(request, etag, last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return set_conditional_headers(response, etag, last_modified)
+
+    def render_export(self, export_format):
+        """
+        Exporta todos os registros da listagem filtrada (mesmos filtros e ordenação),
+        em streaming e com memória constante (ver common/export.py).
+        """
+        if export_format not in self.export_formats or export_format not in EXPORT_FORMATS:
+            raise Http404("Formato de exportação não suportado.")
+
+        filename = self.export_filename or str(self.model._meta.verbose_name_plural)
+        header = [h.get('label', h['field']) for h in self.table_headers]
+        return export_response(header, self.get_export_rows(), export_format, filename)
+
+    def get_export_rows(self):
+        """
+        Linhas exportadas com os mesmos valores exibidos na tabela: pelo RowFormatter
+        (caminho rápido) ou pelo get_row_data da view, sem o HTML das células.
+        """
+        ordering = self.get_keyset_ordering()
+        if self.fast_rows:
+            fields = self.get_list_values_fields()
+            return iter_export_rows(
+                self.get_queryset(), RowFormatter(self.table_headers, fields).values, fields, ordering,
+            )
+        return iter_export_rows(
+            self.get_queryset(), lambda item: plain_cells(self.get_row_data(item)), ordering=ordering,
+        )
+
+    def get_export_url(self, export_format):
+        """
+        URL de exportação preservando os filtros e a ordenação atuais.
+        """
+        params = self.request.GET.copy()
+        for key in self.get_export_ignored_params():
+            params.pop(key, None)
+        params[self.export_param] = export_format
+        return f"{self.request.path}?{params.urlencode()}"
+
+    def get_export_ignored_params(self):
+        # Posição na listagem: a exportação traz todos os registros filtrados
+        return ('page', self.cursor_param, self.page_size_param)
+
+    def get_export_links(self):
+        # 'format', 'param' e 'ignore': o ajax_table.js refaz a URL após cada busca AJAX
+        # (os links ficam fora do container de resultados atualizado)
+        return [
+            {
+                'label': f'Exportar {export_format.upper()}',
+                'url': self.get_export_url(export_format),
+                'class': 'btn-list',
+                'icon': 'fas fa-file-export',
+                'format': export_format,
+                'param': self.export_param,
+                'ignore': ','.join(self.get_export_ignored_params()),
+            }
+            for export_format in self.export_formats
+        ]
+
+    def get_max_paginate_by(self):
+        return self.max_paginate_by or getattr(settings, 'LIST_MAX_PAGE_SIZE', DEFAULT_MAX_PAGE_SIZE)
+
+    def get_page_size_options(self):
+        """
+        Tamanhos oferecidos no seletor: opções da view (ou do settings) até o teto, e o padrão da view.
+        """
+        options = self.page_size_options or getattr(settings, 'LIST_PAGE_SIZE_OPTIONS', DEFAULT_PAGE_SIZE_OPTIONS)
+        max_size = self.get_max_paginate_by()
+        return sorted({int(o) for o in options if int(o) <= max_size} | {self.paginate_by})
+
+    def get_requested_page_size(self):
+        """
+        Tamanho pedido em ?records_per_page= (inteiro positivo) ou None se ausente/inválido.
+        """
+        try:
+            value = int(self.request.GET.get(self.page_size_param, ''))
+        except ValueError:
+            return None
+        return value if value > 0 else None
+
     def get_paginate_by(self, queryset):
-        return self.request.GET.get('records_per_page', self.paginate_by)
+        requested = self.get_requested_page_size()
+        if requested is None:
+            return self.paginate_by
+        options = self.get_page_size_options()
+        allowed = [o for o in options if o <= requested]
+        return allowed[-1] if allowed else options[0]
+
+    def get_sortable_fields(self):
+        """
+        Colunas que podem ser ordenadas via ?order_by=: as do table_headers,
+        exceto as marcadas com 'sortable': False. A checagem common.W001
+        avisa quando alguma delas não tem índice no banco.
+        """
+        return [h['field'] for h in self.table_headers if h.get('sortable', True)]
 
     def get_ordering(self):
+        """
+        Ordenação pedida na requisição, apenas se a coluna estiver na lista permitida.
+        """
         order_by = self.request.GET.get('order_by')
+        if not order_by or order_by not in self.get_sortable_fields():
+            return None
         descending = self.request.GET.get('descending', 'False')
-        if order_by:
-            return f"-{order_by}" if descending == 'True' else order_by
-        return None
+        return f"-{order_by}" if descending == 'True' else order_by
+
+    def get_stable_ordering(self, ordering):
+        """
+        Ordenação + desempate pela pk no mesmo sentido, para páginas estáveis
+        (registros com o mesmo valor não "pulam" entre páginas).
+        """
+        field = ordering.lstrip('-')
+        if field in ('pk', 'id'):
+            return [ordering]
+        return [ordering, '-pk' if ordering.startswith('-') else 'pk']
+
+    def get_list_select_related(self):
+        """
+        Relações do select_related: as declaradas + as usadas em list_only_fields.
+        """
+        related = list(self.list_select_related)
+        for field in self.list_only_fields or []:
+            if '__' in field:
+                path = field.rsplit('__', 1)[0]
+                if path not in related:
+                    related.append(path)
+        return related
+
+    def get_list_only_fields(self):
+        """
+        Colunas do only(), incluindo as chaves das relações percorridas
+        (exigência do Django para combinar only() com select_related()).
+        """
+        if not self.list_only_fields:
+            return None
+
+        fields = list(self.list_only_fields)
+        for path in self.get_list_select_related():
+            parts = path.split('__')
+            for i in range(1, len(parts) + 1):
+                prefix = '__'.join(parts[:i])
+                if prefix not in fields:
+                    fields.append(prefix)
+
+        # O cursor lê a coluna de ordenação dos registros: ela precisa estar carregada
+        if self.pagination_mode == 'keyset':
+            field = self.get_keyset_ordering().lstrip('-')
+            if field not in fields and field not in ('pk', 'id') and field not in self.list_annotations:
+                fields.append(field)
+        return fields
+
+    def get_list_values_fields(self):
+        """
+        Colunas do values_list do caminho rápido: pk + colunas da tabela
+        (+ coluna de ordenação do cursor, na paginação 'keyset').
+        """
+        fields = ['pk']
+        columns = list(self.list_only_fields or []) + [h['field'] for h in self.table_headers]
+        if self.pagination_mode == 'keyset':
+            columns.append(self.get_keyset_ordering().lstrip('-'))
+        if self.use_row_cache():
+            columns.append(ROW_VERSION)
+        for field in columns:
+            if field not in fields:
+                fields.append(field)
+        return fields
+
+    def use_row_cache(self):
+        return bool(self.row_cache) and has_change_tracking(self.model)
+
+    def render_row_fragments(self, rows):
+        """
+        Corpo da tabela com cache por linha: só as linhas alteradas (nova versão) são renderizadas.
+        """
+        if self.fast_rows:
+            formatter = self.get_row_formatter()
+            render = formatter.format_row
+            url_signature = compile_url_template(self.detail_url_name)(0) if self.detail_url_name else None
+        else:
+            def render(item):
+                return render_cells(self.get_row_data(item))
+            url_signature = None
+
+        columns = signature(type(self).__qualname__, self.table_headers, url_signature)
+        prefix = f"common:rows:{self.model._meta.label_lower}:{columns}"
+        version_for = attrgetter('pk', ROW_VERSION)
+        return mark_safe(cached_page('rows', rows, version_for, render, prefix))  # noqa: S308
+
+    def get_row_formatter(self):
+        url_for = compile_url_template(self.detail_url_name) if self.detail_url_name else None
+        return RowFormatter(self.table_headers, self.get_list_values_fields(), url_for)
+
+    def apply_query_plan(self, queryset):
+        related = self.get_list_select_related()
+        if related:
+            queryset = queryset.select_related(*related)
+
+        only_fields = self.get_list_only_fields()
+        if only_fields:
+            queryset = queryset.only(*only_fields)
+
+        if self.list_annotations:
+            queryset = queryset.annotate(**self.list_annotations)
+        # A versão da linha compõe a chave do cache de fragmentos
+        if self.use_row_cache():
+            queryset = queryset.annotate(**{ROW_VERSION: Cast(VERSION_FIELD, output_field=CharField())})
+        return queryset
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = self.apply_query_plan(super().get_queryset())
 
         # Filtro automático baseado no search_config
         for config in self.search_config:
@@ -54,7 +393,7 @@ class CommonListView(LoginRequiredMixin, ListView):
 
             if value:
                 if ftype == 'text':
-                    queryset = queryset.filter(**{f"{field}__icontains": value})
+                    queryset = self.apply_text_search(queryset, config, value)
                 elif ftype in ('select', 'boolean'):
                     if value == 'True':
                         value = True
@@ -62,18 +401,64 @@ class CommonListView(LoginRequiredMixin, ListView):
                         value = False
                     queryset = queryset.filter(**{field: value})
 
-        ordering = self.get_ordering()
-        if ordering:
-            queryset = queryset.order_by(ordering)
+        # Ordenação pedida (ou a padrão do model) sempre com desempate pela pk
+        ordering = self.get_ordering() or self.get_keyset_ordering()
+        queryset = queryset.order_by(*self.get_stable_ordering(ordering))
+
+        if self.fast_rows:
+            queryset = queryset.values_list(*self.get_list_values_fields(), named=True)
         return queryset
 
+    def get_keyset_ordering(self):
+        """
+        Ordenação usada pelo cursor: a ordenação ativa da requisição ou,
+        na falta dela, a primeira ordenação do Meta do model.
+        """
+        ordering = self.get_ordering()
+        if not ordering:
+            meta_ordering = [o for o in self.model._meta.ordering if isinstance(o, str)]
+            ordering = meta_ordering[0] if meta_ordering else 'pk'
+        return ordering
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        if issubclass(self.paginator_class, CountingPaginator):
+            kwargs.setdefault('count_strategy', self.count_strategy)
+            kwargs.setdefault('count_timeout', self.count_cache_timeout)
+        return super().get_paginator(
+            queryset, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page, **kwargs
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.pagination_mode != 'keyset':
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, page_size, self.get_keyset_ordering())
+        page = paginator.page(self.request.GET.get(self.cursor_param))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def apply_text_search(self, queryset, config, value):
+        """
+        Aplica a busca textual de um campo do search_config.
+        O termo é normalizado da mesma forma que a coluna consultada foi gravada.
+        """
+        column = config.get('search_field', config.get('name'))
+        lookup = SEARCH_LOOKUPS[config.get('lookup', 'icontains')]
+
+        normalizer = SEARCH_NORMALIZERS.get(config.get('normalize'))
+        if normalizer:
+            value = normalizer(value)
+            if not value:
+                return queryset
+
+        return queryset.filter(lookup(column, value))
+
     def get_row_data(self, item):
         raise NotImplementedError("Implemente get_row_data na view filha")
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-
-        # 1. PROCESSAMENTO DA BUSCA
+    def prepare_search_fields(self):
+        """
+        Configurações da busca com os valores preenchidos e as opções dos selects vindas do banco.
+        """
         prepared_search = []
         for config in self.search_config:
             c = config.copy()
@@ -82,6 +467,48 @@ class CommonListView(LoginRequiredMixin, ListView):
             if 'queryset' in config:
                 c['options'] = [(o.pk, str(o)) for o in config['queryset']]
             prepared_search.append(c)
+        return prepared_search
+
+    def get_search_options_version(self):
+        """
+        Versão das tabelas das opções vindas do banco (table_version de cada queryset: maior
+        updated_at + exclusões, sem percorrer o queryset). None se alguma delas não tiver
+        controle de versão (o HTML não é guardado).
+        """
+        versions = []
+        for config in self.search_config:
+            queryset = config.get('queryset')
+            if queryset is None:
+                continue
+            if not has_change_tracking(queryset.model):
+                return None
+            versions.append(table_version(queryset.model))
+        return versions
+
+    def render_search_fields(self):
+        def render():
+            return render_to_string('includes/search_fields.html', {'search_fields': self.prepare_search_fields()})
+
+        versions = self.get_search_options_version() if self.search_fields_cache else None
+        if versions is None:
+            return render()
+
+        static = [
+            {k: v for k, v in config.items() if k != 'queryset'}
+            for config in self.search_config
+        ]
+        values = [self.request.GET.get(config['name'], '') for config in self.search_config]
+        key = f"common:search:{self.model._meta.label_lower}:{signature(type(self).__qualname__, static, values, versions)}"
+        return mark_safe(cached_fragment('search_fields', key, render))  # noqa: S308
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        is_ajax = self.request.headers.get('x-requested-with') == 'XMLHttpRequest'
+
+        # 1. PROCESSAMENTO DA BUSCA
+        # O partial AJAX não exibe o formulário de busca: nada a montar nesse caso
+        search_fields_html = '' if is_ajax else self.render_search_fields()
 
         # 2. PROCESSAMENTO DOS BOTÕES DO CABEÇALHO (header_buttons)
         # Se a view filha não definiu botões, tentamos criar um "Novo" padrão se houver new_url definida
@@ -102,13 +529,30 @@ class CommonListView(LoginRequiredMixin, ListView):
             }
         ]
 
+        # 4. LINHAS DA TABELA
+        # Caminho rápido: corpo da tabela pronto (table_body); padrão: células por get_row_data
+        if self.use_row_cache():
+            rows = []
+            table_body = self.render_row_fragments(context['page_obj'])
+        elif self.fast_rows:
+            rows = []
+            table_body = self.get_row_formatter().render(context['page_obj'])
+        else:
+            rows = [self.get_row_data(item) for item in context['page_obj']]
+            table_body = None
+
         # Monta o contexto padrão
         context.update({
             'title': self.title,
             'header_buttons': buttons,
-            'search_fields': prepared_search,
+            'export_links': self.get_export_links(),
+            'page_size': self.get_paginate_by(None),
+            'page_size_options': self.get_page_size_options(),
+            'search_fields': self.search_config,
+            'search_fields_html': search_fields_html,
             'headers': self.table_headers,
-            'rows': [self.get_row_data(item) for item in context['page_obj']],
+            'rows': rows,
+            'table_body': table_body,
             'query_params': self.request.GET.urlencode()
         })
         return context
@@ -119,13 +563,18 @@ class CommonListView(LoginRequiredMixin, ListView):
         Caso contrário, retorna o template completo definido na view filha via template_name.
         """
         if self.request.headers.get('x-requested-with') == 'XMLHttpRequest':
-            return self.response_class(
+            response = self.response_class(
                 request=self.request,
                 template='includes/partial_list_results.html',
                 context=context,
                 **response_kwargs
             )
-        return super().render_to_response(context, **response_kwargs)
+        else:
+            response = super().render_to_response(context, **response_kwargs)
+
+        # A mesma URL devolve a página completa ou o partial: caches não podem misturar os dois
+        patch_vary_headers(response, ['X-Requested-With'])
+        return response
 
 class CommonFormMixin:
     """
@@ -262,6 +711,57 @@ class CommonDetailView(LoginRequiredMixin, DetailView):
     return_url = ""
     template_name = 'includes/apps_detail.html'
 
+    # Plano de consulta do objeto exibido: relações carregadas junto com ele,
+    # evitando uma consulta por item nas abas (N+1).
+    # Ex: detail_prefetch_related = [Prefetch('addresses', queryset=Address.objects.select_related('city__uf'))]
+    detail_select_related = []
+    detail_prefetch_related = []
+
+    # GET condicional (ETag/Last-Modified) pela versão do objeto (updated_at).
+    # Relações exibidas nas abas só mudam a versão se o objeto principal for salvo junto
+    # (ex: formsets do ClientUpdateView); do contrário, sobrescreva get_object_version.
+    # Dados de referência exibidos (cidades, tipos...) entram por get_related_versions.
+    conditional_get = True
+
+    def get_object_version(self):
+        """
+        updated_at do objeto exibido, numa consulta simples: o mesmo get_queryset() da
+        página (com as restrições das subclasses), sem o plano de select/prefetch.
+        """
+        queryset = self.get_queryset().select_related(None).prefetch_related(None).order_by()
+        queryset = queryset.filter(pk=self.kwargs.get(self.pk_url_kwarg))
+        return queryset.values_list(VERSION_FIELD, flat=True).first()
+
+    def get_related_versions(self):
+        """
+        Versões de dados exibidos na página que não pertencem ao objeto (ex: nomes de
+        cidades e tipos de contato lidos dos caches de referência). Compõem o ETag.
+        """
+        return []
+
+    def get(self, request, *args, **kwargs):
+        if not (self.conditional_get and has_change_tracking(self.model) and can_use_conditional(request)):
+            return super().get(request, *args, **kwargs)
+
+        last_modified = self.get_object_version()
+        if last_modified is None:
+            # Objeto inexistente: o fluxo normal responde 404
+            return super().get(request, *args, **kwargs)
+
+        etag = make_etag(request, last_modified.isoformat(), *self.get_related_versions())
+        response = not_modified_response(request, etag, last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return set_conditional_headers(response, etag, last_modified)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.detail_select_related:
+            queryset = queryset.select_related(*self.detail_select_related)
+        if self.detail_prefetch_related:
+            queryset = queryset.prefetch_related(*self.detail_prefetch_related)
+        return queryset
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         obj = self.object
@@ -317,3 +817,80 @@ def api_busca_cep(request, cep):
         return JsonResponse(resultado, status=HTTPStatus.BAD_REQUEST)
 
     return JsonResponse(resultado)
+
+
+@require_http_methods(["GET"])
+async def api_busca_cep_async(request, cep):
+    """
+    Variante assíncrona do endpoint de CEP (servida via ASGI).
+    Não prende um worker enquanto aguarda a BrasilAPI.
+    """
+    resultado = await abuscar_dados_cep(cep)
+
+    if "erro" in resultado:
+        return JsonResponse(resultado, status=HTTPStatus.BAD_REQUEST)
+
+    return JsonResponse(resultado)
+
+
+def _consumir_cota(chave, quantidade, limite, janela):
+    """
+    Janela fixa no cache: soma 'quantidade' ao uso da janela atual e
+    retorna (permitido, segundos até a próxima janela).
+    """
+    agora = time.time()
+    inicio = int(agora // janela)
+    key = f"common:cota:{chave}:{inicio}"
+    cache.add(key, 0, janela)
+    try:
+        usado = cache.incr(key, quantidade)
+    except ValueError:
+        # Chave expirou entre o add e o incr
+        cache.set(key, quantidade, janela)
+        usado = quantidade
+    return usado <= limite, int((inicio + 1) * janela - agora) + 1
+
+
+@login_required
+@require_http_methods(["POST"])
+def api_busca_ceps(request):
+    """
+    Endpoint API para resolver vários CEPs de uma vez.
+    Corpo JSON: {"ceps": ["30130010", "01001-000", ...]}
+    Resposta: {"resultados": {"30130010": {...}, ...}}
+    Cada usuário pode resolver até CEP_LOTE_COTA CEPs por minuto (acima disso: 429).
+    """
+    try:
+        ceps = json.loads(request.body or b'{}').get('ceps')
+    except (ValueError, AttributeError):
+        ceps = None
+
+    if not isinstance(ceps, list):
+        return JsonResponse({"erro": "Envie um JSON no formato {\"ceps\": [...]}."}, status=HTTPStatus.BAD_REQUEST)
+    if len(ceps) > MAX_CEPS_POR_LOTE:
+        return JsonResponse(
+            {"erro": f"Máximo de {MAX_CEPS_POR_LOTE} CEPs por requisição."},
+            status=HTTPStatus.BAD_REQUEST
+        )
+
+    permitido, espera = _consumir_cota(
+        f"ceps:{request.user.pk}", len({str(c) for c in ceps}), CEP_LOTE_COTA, CEP_LOTE_JANELA
+    )
+    if not permitido:
+        response = JsonResponse(
+            {"erro": "Limite de consultas de CEP atingido. Tente novamente em instantes."},
+            status=HTTPStatus.TOO_MANY_REQUESTS,
+        )
+        response['Retry-After'] = str(espera)
+        return response
+
+    return JsonResponse({"resultados": buscar_dados_ceps(ceps)})
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def api_cache_stats(request):
+    """
+    Estatísticas de acerto/erro do cache de fragmentos deste processo (linhas e campos de busca).
+    """
+    return JsonResponse({"fragments": fragment_stats.snapshot()})
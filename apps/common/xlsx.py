@@ -0,0 +1,234 @@
+# apps/common/xlsx.py
+
+"""
+Leitura e escrita mínimas de planilhas XLSX em streaming (sem dependências externas).
+
+Um .xlsx é um ZIP com alguns XMLs. A planilha é escrita linha a linha dentro do
+ZIP e os bytes já comprimidos são devolvidos em blocos conforme ficam prontos,
+então a memória usada não depende da quantidade de linhas e o download começa
+imediatamente. Textos vão como "inline strings" (sem tabela de strings
+compartilhadas, que exigiria conhecer todos os valores antes).
+
+A leitura (iter_xlsx_rows) percorre a primeira aba com iterparse, descartando
+cada linha depois de processada: apenas a tabela de strings compartilhadas
+fica inteira na memória. O arquivo vem do usuário: o ElementTree não resolve
+entidades externas e o expat (>= 2.4.1, o da biblioteca padrão) limita a
+expansão de entidades, o que cobre os ataques de XML que o defusedxml evitaria.
+"""
+
+import posixpath
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from xml.etree.ElementTree import iterparse, parse
+from xml.sax.saxutils import escape
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+# Nome de aba: até 31 caracteres, sem []:*?/\
+_INVALID_SHEET_CHARS = str.maketrans('', '', '[]:*?/\\')
+
+
+class _ChunkBuffer:
+    """
+    Destino não-posicionável do ZipFile: acumula os bytes até serem coletados.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def collect(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    if isinstance(value, datetime):
+        value = value.strftime('%d/%m/%Y %H:%M')
+    elif isinstance(value, date):
+        value = value.strftime('%d/%m/%Y')
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+
+
+def _row(values):
+    return '<row>' + ''.join(_cell(v) for v in values) + '</row>'
+
+
+def stream_xlsx(header, rows, sheet_name="Dados", flush_every=500):
+    """
+    Gera os bytes de um .xlsx com uma aba: cabeçalho + linhas (iteráveis de valores).
+    """
+    buffer = _ChunkBuffer()
+    name = escape(sheet_name.translate(_INVALID_SHEET_CHARS)[:31] or "Dados")
+
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _ROOT_RELS)
+        zf.writestr('xl/workbook.xml', _WORKBOOK.format(name=name))
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((_SHEET_START + _row(header)).encode('utf-8'))
+            for count, values in enumerate(rows, start=1):
+                sheet.write(_row(values).encode('utf-8'))
+                if count % flush_every == 0:
+                    data = buffer.collect()
+                    if data:
+                        yield data
+            sheet.write(_SHEET_END.encode('utf-8'))
+
+    yield buffer.collect()
+
+
+# --- Leitura ---
+
+_NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def _first_sheet_path(zf):
+    """
+    Caminho (dentro do ZIP) da primeira aba do workbook.
+    """
+    workbook = parse(zf.open('xl/workbook.xml')).getroot()  # noqa: S314 (ver docstring do módulo)
+    sheet = workbook.find(f'{_NS_MAIN}sheets/{_NS_MAIN}sheet')
+    if sheet is None:
+        raise ValueError("Planilha sem abas.")
+    rel_id = sheet.get(f'{_NS_REL}id')
+
+    rels = parse(zf.open('xl/_rels/workbook.xml.rels')).getroot()  # noqa: S314 (ver docstring do módulo)
+    for rel in rels.iter(f'{_NS_PKG_REL}Relationship'):
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target')
+            return target.lstrip('/') if target.startswith('/') else posixpath.normpath(f'xl/{target}')
+    raise ValueError("Aba não encontrada no workbook.")
+
+
+def _shared_strings(zf):
+    if 'xl/sharedStrings.xml' not in zf.namelist():
+        return []
+    strings = []
+    for _event, item in iterparse(zf.open('xl/sharedStrings.xml')):  # noqa: S314 (ver docstring do módulo)
+        if item.tag == f'{_NS_MAIN}si':
+            strings.append(''.join(t.text or '' for t in item.iter(f'{_NS_MAIN}t')))
+            item.clear()
+    return strings
+
+
+def _column_index(reference):
+    """
+    'C12' -> 2 (posição da coluna, a partir de zero).
+    """
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - 64)
+    return index - 1
+
+
+def _number_text(text):
+    """
+    Números inteiros gravados como '3.1999999999E10' ou '123.0' voltam como '31999999999' e '123'.
+    """
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        return text
+    return str(int(number)) if number == number.to_integral_value() else text
+
+
+def _cell_value(cell, strings):
+    kind = cell.get('t')
+    if kind == 'inlineStr':
+        return ''.join(t.text or '' for t in cell.iter(f'{_NS_MAIN}t'))
+    value = cell.find(f'{_NS_MAIN}v')
+    text = value.text if value is not None else None
+    if text is None:
+        return None
+    if kind == 's':
+        return strings[int(text)]
+    if kind in ('str', 'e'):
+        return text
+    if kind == 'b':
+        return text == '1'
+    return _number_text(text)
+
+
+def iter_xlsx_rows(file):
+    """
+    Percorre as linhas da primeira aba de um .xlsx (caminho ou arquivo binário),
+    devolvendo listas de valores (texto, número como texto, bool ou None).
+    """
+    with zipfile.ZipFile(file) as zf:
+        strings = _shared_strings(zf)
+        with zf.open(_first_sheet_path(zf)) as sheet:
+            for _event, item in iterparse(sheet):  # noqa: S314 (ver docstring do módulo)
+                if item.tag != f'{_NS_MAIN}row':
+                    continue
+                values = []
+                for cell in item.iter(f'{_NS_MAIN}c'):
+                    reference = cell.get('r')
+                    if reference:
+                        position = _column_index(reference)
+                        values.extend([None] * (position - len(values)))
+                    values.append(_cell_value(cell, strings))
+                item.clear()
+                yield values
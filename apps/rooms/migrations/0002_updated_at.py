@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+        migrations.AddField(
+            model_name='roompart',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+    ]
@@ -120,6 +120,46 @@ else:
         }
     }
 
+# --- CACHE ---
+# Usado pelas contagens das listagens (e demais caches da aplicação).
+# Padrão: memória local do processo. Em produção com vários workers, prefira
+# um cache compartilhado (ex: CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache
+# e CACHE_LOCATION=django_cache, após rodar 'python manage.py createcachetable').
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'rnpinturas'),
+    }
+}
+# Memória local e banco limitam o número de chaves (padrão do Django: 300, menos que
+# uma página de 500 linhas no cache de fragmentos). Memcached/Redis não usam esta opção.
+if CACHES['default']['BACKEND'].endswith(('.LocMemCache', '.DatabaseCache', '.FileBasedCache')):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '20000'))}
+
+# --- LISTAGENS ---
+# Tamanhos de página aceitos em ?records_per_page= e teto absoluto por página.
+# Pedidos acima do teto são redirecionados para a exportação em streaming (CSV).
+LIST_PAGE_SIZE_OPTIONS = [20, 50, 100, 500]
+LIST_MAX_PAGE_SIZE = int(os.getenv('LIST_MAX_PAGE_SIZE', '500'))
+
+# --- CONSULTA DE CEP (BrasilAPI) ---
+# Validade, em segundos, das respostas guardadas na tabela cep_cache.
+CEP_CACHE_TTL = int(os.getenv('CEP_CACHE_TTL', '2592000'))  # 30 dias
+CEP_CACHE_NOT_FOUND_TTL = int(os.getenv('CEP_CACHE_NOT_FOUND_TTL', '86400'))  # 1 dia
+# Janela após o vencimento em que o registro é servido na hora e atualizado em segundo plano
+CEP_CACHE_STALE_TTL = int(os.getenv('CEP_CACHE_STALE_TTL', '604800'))  # 7 dias
+
+# Cliente da BrasilAPI: timeout (s) e circuit breaker (falhas seguidas / segundos em pausa)
+CEP_API_TIMEOUT = int(os.getenv('CEP_API_TIMEOUT', '5'))
+CEP_CIRCUIT_FAILURES = int(os.getenv('CEP_CIRCUIT_FAILURES', '5'))
+CEP_CIRCUIT_RESET_TIMEOUT = int(os.getenv('CEP_CIRCUIT_RESET_TIMEOUT', '30'))
+
+# Endpoint de CEPs em lote: CEPs por usuário a cada minuto
+CEP_BATCH_RATE_LIMIT = int(os.getenv('CEP_BATCH_RATE_LIMIT', '1000'))
+
+# Índice offline de faixas de CEP -> cidade (gerado por 'python manage.py build_cep_index')
+CEP_RANGE_INDEX_PATH = os.getenv('CEP_RANGE_INDEX_PATH', str(BASE_DIR / 'data' / 'cep_ranges.bin'))
+
 # --- VALIDAÇÃO DE SENHA ---
 AUTH_PASSWORD_VALIDATORS = [
     {
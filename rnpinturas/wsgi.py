@@ -16,3 +16,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rnpinturas.settings')
 
 application = get_wsgi_application()
+
+# Pré-carrega os dados de referência em memória (UFs, cidades e índice do autocomplete)
+from cities.search import warm_city_index  # noqa: E402
+
+warm_city_index()
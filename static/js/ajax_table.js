@@ -5,35 +5,147 @@ document.addEventListener('DOMContentLoaded', function() {
     const searchForm = document.getElementById('search-form');
     const clearBtn = document.getElementById('btn-clear-search');
 
-    // Função principal que busca os dados e atualiza o DOM
-    function fetchResults(url) {
-        // Feedback visual de carregamento (Opcional: Adicionar classe de loading)
-        listContainer.style.opacity = '0.5';
-        listContainer.style.pointerEvents = 'none'; // Previne cliques duplos
+    if (!listContainer) return;
+
+    // --- CONFIGURAÇÃO ---
+    const CACHE_MAX_ENTRIES = 20;        // Páginas guardadas (LRU)
+    const CACHE_TTL_MS = 60 * 1000;      // Validade de cada página guardada
+    const LIVE_SEARCH_DELAY_MS = 350;    // Espera após a última tecla antes de buscar
+
+    // --- CACHE LRU DE RESULTADOS (chave: URL) ---
+    // Map mantém a ordem de inserção: o primeiro item é o menos usado recentemente.
+    const cache = new Map();
+
+    function cacheGet(url) {
+        const entry = cache.get(url);
+        if (!entry) return null;
+        if (Date.now() - entry.time > CACHE_TTL_MS) {
+            cache.delete(url);
+            return null;
+        }
+        // Reinsere para marcar como usado recentemente
+        cache.delete(url);
+        cache.set(url, entry);
+        return entry.html;
+    }
 
-        fetch(url, {
+    function cacheSet(url, html) {
+        cache.delete(url);
+        cache.set(url, {html: html, time: Date.now()});
+        while (cache.size > CACHE_MAX_ENTRIES) {
+            cache.delete(cache.keys().next().value);
+        }
+    }
+
+    function normalizeUrl(url) {
+        return new URL(url, window.location.href).toString();
+    }
+
+    // --- BUSCA DOS RESULTADOS ---
+    let currentController = null;   // Requisição visível em andamento (cancelável)
+    const prefetching = new Set();  // URLs sendo pré-carregadas
+    let liveSearchTimer = null;     // Debounce da busca ao digitar
+
+    function request(url, signal) {
+        return fetch(url, {
             headers: {
                 'X-Requested-With': 'XMLHttpRequest'
-            }
+            },
+            signal: signal
         })
         .then(response => {
             if (!response.ok) throw new Error('Erro na requisição');
             return response.text();
-        })
-        .then(html => {
-            // Atualiza apenas o container de resultados
-            listContainer.innerHTML = html;
-            
-            // Atualiza a URL do navegador sem recarregar (Histórico)
+        });
+    }
+
+    // Links de exportação (sidebar, fora do container): acompanham os filtros e a ordenação exibidos
+    const exportLinks = document.querySelectorAll('a[data-export-format]');
+
+    function updateExportLinks(url) {
+        exportLinks.forEach(link => {
+            const target = new URL(url);
+            link.dataset.exportIgnore.split(',').forEach(name => target.searchParams.delete(name));
+            target.searchParams.set(link.dataset.exportParam, link.dataset.exportFormat);
+            link.href = target.toString();
+        });
+    }
+
+    function render(url, html, pushHistory) {
+        // Atualiza apenas o container de resultados
+        listContainer.innerHTML = html;
+        updateExportLinks(url);
+
+        // Atualiza a URL do navegador sem recarregar (Histórico)
+        if (pushHistory) {
             window.history.pushState({path: url}, '', url);
-            
-            // Reatribui os eventos aos novos elementos carregados via AJAX
-            attachDynamicEvents();
+        }
+
+        // Reatribui os eventos aos novos elementos carregados via AJAX
+        attachDynamicEvents();
+        schedulePrefetch();
+    }
+
+    // Feedback visual de carregamento (container esmaecido e sem cliques duplos)
+    function setLoading(loading) {
+        listContainer.style.opacity = loading ? '0.5' : '1';
+        listContainer.style.pointerEvents = loading ? 'none' : 'auto';
+    }
+
+    // Função principal que busca os dados e atualiza o DOM
+    function fetchResults(url, pushHistory = true) {
+        url = normalizeUrl(url);
+
+        // Uma nova navegação cancela a anterior: respostas antigas nunca sobrescrevem as novas
+        if (currentController) currentController.abort();
+
+        const cached = cacheGet(url);
+        if (cached !== null) {
+            // A requisição cancelada acima não libera mais o container: libera aqui
+            currentController = null;
+            setLoading(false);
+            render(url, cached, pushHistory);
+            return;
+        }
+
+        const controller = new AbortController();
+        currentController = controller;
+
+        setLoading(true);
+
+        request(url, controller.signal)
+        .then(html => {
+            cacheSet(url, html);
+            render(url, html, pushHistory);
+        })
+        .catch(error => {
+            if (error.name !== 'AbortError') console.error('Error:', error);
         })
-        .catch(error => console.error('Error:', error))
         .finally(() => {
-            listContainer.style.opacity = '1';
-            listContainer.style.pointerEvents = 'auto';
+            // Só a requisição mais recente libera o container
+            if (currentController === controller) {
+                currentController = null;
+                setLoading(false);
+            }
+        });
+    }
+
+    // --- PRÉ-CARREGAMENTO DA PRÓXIMA PÁGINA (quando o navegador estiver ocioso) ---
+    const whenIdle = window.requestIdleCallback || function(callback) { return setTimeout(callback, 200); };
+
+    function schedulePrefetch() {
+        whenIdle(function() {
+            const next = listContainer.querySelector('.pagination-link.btn-next');
+            if (!next) return;
+
+            const url = normalizeUrl(next.href);
+            if (cacheGet(url) !== null || prefetching.has(url)) return;
+
+            prefetching.add(url);
+            request(url)
+            .then(html => cacheSet(url, html))
+            .catch(() => {})  // Falha no pré-carregamento é silenciosa: a navegação busca de novo
+            .finally(() => prefetching.delete(url));
         });
     }
 
@@ -56,11 +168,14 @@ document.addEventListener('DOMContentLoaded', function() {
                 const form = this.closest('form');
                 const url = new URL(form.action, window.location.origin);
                 const formData = new FormData(form);
-                
+
                 // Converte FormData para QueryString
                 const params = new URLSearchParams(formData);
+                // Trocar o tamanho da página invalida o número da página (paginação OFFSET),
+                // mas o cursor (paginação keyset) continua válido: é uma posição, não um índice
+                params.delete('page');
                 url.search = params.toString();
-                
+
                 fetchResults(url.toString());
             });
         }
@@ -68,23 +183,55 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // --- EVENTOS ESTÁTICOS (Sidebar) ---
 
+    function searchUrl() {
+        const url = new URL(searchForm.action, window.location.origin);
+        const formData = new FormData(searchForm);
+        url.search = new URLSearchParams(formData).toString();
+        return url.toString();
+    }
+
     // 1. Interceptar o Submit do Formulário de Busca
     if (searchForm) {
         searchForm.addEventListener('submit', function(e) {
             e.preventDefault();
-            const url = new URL(this.action, window.location.origin);
-            const formData = new FormData(this);
-            url.search = new URLSearchParams(formData).toString();
-            
-            fetchResults(url.toString());
+            clearTimeout(liveSearchTimer);
+            fetchResults(searchUrl());
         });
     }
 
-    // 2. Botão Limpar
+    // 2. Busca ao digitar (data-live-search no formulário): espera o usuário parar de digitar
+    function liveSearch() {
+        clearTimeout(liveSearchTimer);
+        liveSearchTimer = setTimeout(function() {
+            const url = searchUrl();
+            // Não repete a busca se nada mudou (ex: setas, Shift)
+            if (normalizeUrl(url) !== normalizeUrl(window.location.href)) {
+                fetchResults(url);
+            }
+        }, LIVE_SEARCH_DELAY_MS);
+    }
+
+    if (searchForm && searchForm.dataset.liveSearch === 'true') {
+        searchForm.addEventListener('input', function(e) {
+            if (e.target.matches('input[type="text"], input[type="search"], input:not([type])')) {
+                liveSearch();
+            }
+        });
+        searchForm.addEventListener('change', function(e) {
+            if (e.target.matches('select, input[type="checkbox"]')) liveSearch();
+        });
+        // Select2 dispara 'change' via jQuery (não chega aos listeners nativos)
+        if (window.jQuery) {
+            window.jQuery(searchForm).on('change', 'select', liveSearch);
+        }
+    }
+
+    // 3. Botão Limpar
     if (clearBtn) {
         clearBtn.addEventListener('click', function(e) {
             e.preventDefault();
-            
+            clearTimeout(liveSearchTimer);
+
             // Limpa visualmente os inputs do formulário
             if (searchForm) {
                 searchForm.reset();
@@ -98,11 +245,16 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Inicializa os eventos na primeira carga da página
     attachDynamicEvents();
+    schedulePrefetch();
+
+    // Guarda a página inicial no cache e no histórico: voltar até ela também é instantâneo
+    cacheSet(normalizeUrl(window.location.href), listContainer.innerHTML);
+    window.history.replaceState({path: window.location.href}, '', window.location.href);
 
-    // Suporte ao botão "Voltar" do navegador
+    // Suporte ao botão "Voltar" do navegador (do cache quando possível, sem novo pushState)
     window.addEventListener('popstate', function(event) {
         if (event.state && event.state.path) {
-            fetchResults(event.state.path); // Carrega via AJAX
+            fetchResults(event.state.path, false);
         } else {
             window.location.reload(); // Fallback
         }
@@ -8,25 +8,65 @@ from urllib.parse import parse_qs, urlencode
 
 from django import template
 from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
 
 register = template.Library()
 
 @register.filter
 def remove_page_param(query_params):
     """
-    Remove o parâmetro 'page' dos query parameters.
+    Remove os parâmetros de posição ('page' e 'cursor') dos query parameters.
     """
     params = parse_qs(query_params)
     params.pop('page', None)
+    params.pop('cursor', None)
     return urlencode(params, doseq=True)
 
+def _selected_index(options, value):
+    """
+    Posição da opção selecionada (ou None), calculada uma única vez por campo.
+    """
+    if value == "":
+        return None
+    value = str(value)
+    for index, (option_value, _label) in enumerate(options):
+        if str(option_value) == value:
+            return index
+    return None
+
+def _render_options(options, value):
+    """
+    Gera as <option> de um select em uma única junção (custo linear no número de opções).
+    """
+    options = list(options)
+    selected = _selected_index(options, value)
+    if selected is None:
+        return format_html_join('', '<option value="{}">{}</option>', options)
+
+    return mark_safe(''.join((  # noqa: S308 (partes já escapadas por format_html)
+        format_html_join('', '<option value="{}">{}</option>', options[:selected]),
+        format_html('<option value="{}" selected>{}</option>', *options[selected]),
+        format_html_join('', '<option value="{}">{}</option>', options[selected + 1:]),
+    )))
+
+@register.simple_tag
+def render_options(options, value):
+    """
+    Gera as <option> de um select, marcando a de valor igual a 'value'
+    (usada por includes/search_fields.html).
+    """
+    return _render_options(options, value)
+
 @register.simple_tag
 def render_search_fields(fields, request):
     """
     Gera dinamicamente os campos de pesquisa de forma segura contra XSS.
+
+    As partes (já escapadas por format_html) são acumuladas em uma lista e unidas
+    uma única vez no final: concatenar SafeStrings com += copiaria o HTML inteiro
+    a cada opção, o que torna selects com milhares de opções quadráticos.
     """
-    # Iniciamos o HTML base. format_html marca essa string como segura.
-    html_content = format_html('<div class="apps-list-form-group-search">')
+    parts = ['<div class="apps-list-form-group-search">']
 
     for field in fields:
         field_name = field.get("name")
@@ -35,49 +75,35 @@ def render_search_fields(fields, request):
         field_options = field.get("options", [])
         value = request.GET.get(field_name, "")
 
-        # Montamos a parte inicial do campo (Label e Checkbox)
-        # format_html garante que field_name e field_label sejam escapados se tiverem caracteres perigosos
-        html_content += format_html(
+        # Label e Checkbox: format_html escapa field_name e field_label
+        parts.append(format_html(
             '<div class="apps-list-form-group-search-sub">'
             '<input type="checkbox" id="check-{}" data-target="{}">'
             '<label for="search-{}">{}:</label>',
             field_name, field_name, field_name, field_label
-        )
+        ))
 
         if field_type == "select":
-            html_content += format_html(
+            parts.append(format_html(
                 '<select name="{}" id="{}" class="select-search select2">'
                 '<option value="">-- Selecione --</option>',
                 field_name, field_name
-            )
-
-            for option_value, option_label in field_options:
-                is_selected = str(value) == str(option_value)
-                if is_selected:
-                    html_content += format_html(
-                        '<option value="{}" selected>{}</option>',
-                        option_value, option_label
-                    )
-                else:
-                    html_content += format_html(
-                        '<option value="{}">{}</option>',
-                        option_value, option_label
-                    )
-
-            html_content += format_html('</select>')
+            ))
+            parts.append(_render_options(field_options, value))
+            parts.append('</select>')
 
         else:
             # Input de texto padrão
-            html_content += format_html(
+            parts.append(format_html(
                 '<input type="{}" id="{}" name="{}" value="{}" class="form-control">',
                 field_type, field_name, field_name, value
-            )
+            ))
 
-        html_content += format_html('</div>')
+        parts.append('</div>')
 
-    html_content += format_html('</div>')
+    parts.append('</div>')
 
-    return html_content
+    return mark_safe(''.join(parts))  # noqa: S308 (partes já escapadas por format_html)
 
 @register.filter
 def get_item(dictionary, key):